@@ -47,8 +47,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Compresses responses last, after everything below has written them (brotli or gzip)
+    'sentinel.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    # ETags and 304s for pages whose views don't set validators themselves
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -74,15 +78,145 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+ASGI_APPLICATION = 'core.asgi.application'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+DB_ENGINE = os.getenv("DB_ENGINE", "django.db.backends.sqlite3")
+
+# Seconds to keep a database connection open between requests (0 closes it after each request).
+# Keep 0 under ASGI, the deployment the README describes. WSGI deployments can set 600.
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", 0))
+
+# SQLite tuned for several workers writing at once. WAL lets reads run alongside the
+# single writer, IMMEDIATE transactions take the write lock up front so a busy writer
+# is waited for (up to timeout seconds) instead of failing with "database is locked".
+SQLITE_OPTIONS = {
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': int(os.getenv("DB_TIMEOUT", 20)),
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'  # durable in WAL mode, fsyncs only at checkpoints
+        'PRAGMA cache_size=-20000;'  # 20 MB page cache per connection
+        'PRAGMA mmap_size=134217728;'  # read through 128 MB of memory-mapped I/O
+        'PRAGMA temp_store=MEMORY;'
+    ),
+}
+
+if DB_ENGINE == 'django.db.backends.sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.getenv("DB_NAME", BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': SQLITE_OPTIONS,
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
     }
+else:
+    # A server database, e.g. DB_ENGINE=django.db.backends.postgresql (install its driver too)
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.getenv("DB_NAME"),
+            'USER': os.getenv("DB_USER"),
+            'PASSWORD': os.getenv("DB_PASSWORD"),
+            'HOST': os.getenv("DB_HOST", "localhost"),
+            'PORT': os.getenv("DB_PORT", ""),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+
+# Cache: a small in-process LRU (L1) in front of a cache shared by all workers (L2).
+# CACHE_L2 picks the shared level: 'file' (default), 'db' (run createcachetable first)
+# or 'redis' (any Redis-compatible server at REDIS_URL, needs the redis package).
+CACHE_L2 = os.getenv("CACHE_L2", "file")
+
+CACHE_L2_BACKENDS = {
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv("CACHE_LOCATION", BASE_DIR / '.cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'sentinel_cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv("REDIS_URL", "redis://127.0.0.1:6379"),
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'sentinel.caching.TieredCache',
+        'OPTIONS': {
+            'L1': 'local',
+            'L2': 'shared',
+            # Longest a worker serves a value another worker has since changed
+            'L1_TIMEOUT': int(os.getenv("CACHE_L1_TIMEOUT", 10)),
+        },
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cosmodex-l1',
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv("CACHE_L1_MAX_ENTRIES", 1000))},
+    },
+    'shared': {
+        **CACHE_L2_BACKENDS[CACHE_L2],
+        'KEY_PREFIX': 'cosmodex',
+    },
+}
+
+# Seconds before today's and future NEO feed days are refetched from NASA
+NEO_FEED_TTL = int(os.getenv("NEO_FEED_TTL", 60 * 60))
+
+# Widest date range (in days) /api/neos-data/ accepts, and /api/neo-stats/ refreshes from NASA
+NEO_MAX_RANGE_DAYS = int(os.getenv("NEO_MAX_RANGE_DAYS", 90))
+# Widest date range /api/neo-stats/ accepts, reading what the catalog already holds
+NEO_STATS_MAX_RANGE_DAYS = int(os.getenv("NEO_STATS_MAX_RANGE_DAYS", 10 * 366))
+
+# Seconds a NeoWs lookup of one NEO is cached, and browsers may keep its detail page
+NEO_LOOKUP_TTL = int(os.getenv("NEO_LOOKUP_TTL", 24 * 60 * 60))
+NEO_DETAIL_MAX_AGE = int(os.getenv("NEO_DETAIL_MAX_AGE", 60 * 60))
+
+# Persistent cache of Gemini output (seconds to keep an entry, max entries kept)
+GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", 30 * 24 * 60 * 60))
+GEMINI_CACHE_MAX_ENTRIES = int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", 10000))
+
+# Gemini model and generation config per task. Short, latency-sensitive tasks go to a fast model.
+GEMINI_MODEL_TIERS = {
+    'insights': {
+        'model': os.getenv("GEMINI_INSIGHTS_MODEL", "models/gemini-2.5-flash"),
+        'max_output_tokens': 1024,
+    },
+    'chat': {
+        'model': os.getenv("GEMINI_CHAT_MODEL", "models/gemini-2.5-flash"),
+        'max_output_tokens': 1024,
+    },
+    'briefing': {
+        'model': os.getenv("GEMINI_BRIEFING_MODEL", "models/gemini-2.5-pro"),
+        'max_output_tokens': 2048,
+    },
+}
+
+# Seconds a worker may hold an in-flight Gemini generation before others take over
+GEMINI_LEASE_TIMEOUT = int(os.getenv("GEMINI_LEASE_TIMEOUT", 90))
+
+
+# Write-behind interaction logging: queue interactions in memory and write them in
+# batches from a background thread. Off by default, so interactions are written in the request.
+INTERACTION_BUFFER = {
+    'ENABLED': os.getenv("INTERACTION_BUFFER_ENABLED", "False") == "True",
+    'MAX_SIZE': int(os.getenv("INTERACTION_BUFFER_MAX_SIZE", 100)),
+    'FLUSH_INTERVAL': float(os.getenv("INTERACTION_BUFFER_FLUSH_INTERVAL", 2.0)),
+    # Times a failed batch is retried before it is dropped and logged
+    'MAX_RETRIES': int(os.getenv("INTERACTION_BUFFER_MAX_RETRIES", 3)),
 }
 
 
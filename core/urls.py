@@ -25,13 +25,18 @@ urlpatterns = [
     path('callback/', views.callback, name='callback'),
     path('neo-details/', views.neo_details, name='neo_details'),
     path('chat-quackstronaut/', views.chat_quackstronaut, name='chat_quackstronaut'),
+    path('chat-quackstronaut/stream/', views.chat_quackstronaut_stream, name='chat_quackstronaut_stream'),
     path("save_favorite/", views.save_favorite, name="save_favorite"),
     path("unfavorite/", views.unfavorite, name="unfavorite"),
     path("neos/favorites/", views.favorites, name="favorites"),
     path("neos/", views.index, name="neos"),
+    path("neos/<int:neo_id>/", views.neo_detail, name="neo_detail"),
     path("profile/", views.profile, name="profile"),
     path("api/daily-briefing/", views.get_daily_briefing, name="daily_briefing"),
     path("api/neos-data/", views.get_neos_data, name="neos_data"),
+    path("api/neo-stats/", views.get_neo_stats, name="neo_stats"),
+    path("api/stats/", views.get_stats, name="stats"),
+    path("api/neo-insights/", views.get_neo_insights, name="neo_insights"),
     path("api/neo-summary/", views.get_neo_summary, name="neo_summary"),
     path("api/neo-descriptions/", views.get_neo_descriptions, name="neo_descriptions"),
     path('', views.home, name='home'),
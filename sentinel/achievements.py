@@ -1,118 +1,198 @@
-from django.db.models import Count
-from .models import UserInteraction, Achievement, UserAchievement, FavoriteNEO
+from django.db import transaction
+from django.core.cache import cache
+from django.db.models import Count, Exists, F, OuterRef, Q
+from . import interaction_buffer
+from .models import UserInteraction, Achievement, UserAchievement, UserStats, UserNeoSet
 
 
-def track_user_interaction(user_email, interaction_type, neo_name=None):
+# Which achievement requirement types each interaction type can move
+INTERACTION_METRICS = {
+    'chat_question': ['chat_questions', 'unique_neo_chats'],
+    'neo_favorited': ['favorites_count'],
+    'neo_viewed': ['neos_viewed'],
+    'daily_briefing': ['daily_briefings'],
+}
+
+# Every requirement type, each one a counter on UserStats
+REQUIREMENT_TYPES = ['chat_questions', 'unique_neo_chats', 'favorites_count', 'neos_viewed', 'daily_briefings']
+
+# Profile stats and achievements are cached until the user's counters change
+PROFILE_CACHE_TTL = 60 * 60
+
+
+def track_user_interaction(explorer_id, interaction_type, neo_name=None):
     """Track a user interaction and check for new achievements"""
+    # With INTERACTION_BUFFER enabled the write happens later, in a batch
+    if interaction_buffer.buffer is not None:
+        interaction_buffer.buffer.add(explorer_id, interaction_type, neo_name)
+        return
+
     # Record the interaction
     UserInteraction.objects.create(
-        user_email=user_email,
+        explorer_id=explorer_id,
         interaction_type=interaction_type,
         neo_name=neo_name
     )
     
-    # Check for new achievements
-    check_achievements(user_email)
+    # Update the counters and check only the achievements they affect
+    changed = record_stats(explorer_id, interaction_type, neo_name)
+    if changed:
+        check_achievements(explorer_id, changed)
 
 
-def check_achievements(user_email):
-    """Check if user has unlocked any new achievements"""
-    # Get all achievements not yet unlocked by this user
-    unlocked_achievement_ids = UserAchievement.objects.filter(
-        user_email=user_email
-    ).values_list('achievement_id', flat=True)
-    
-    available_achievements = Achievement.objects.exclude(
-        id__in=unlocked_achievement_ids
+def record_interactions(interactions):
+    """Write a batch of (explorer_id, interaction_type, neo_name) interactions.
+
+    Used by the interaction buffer: one bulk insert, counters per interaction
+    and a single achievement check per user for everything that changed.
+    All in one transaction, so a batch that fails can be retried without
+    writing rows or counting interactions twice.
+    """
+    with transaction.atomic():
+        UserInteraction.objects.bulk_create([
+            UserInteraction(explorer_id=explorer_id, interaction_type=interaction_type, neo_name=neo_name)
+            for explorer_id, interaction_type, neo_name in interactions
+        ])
+
+        changed = {}
+        for explorer_id, interaction_type, neo_name in interactions:
+            changed.setdefault(explorer_id, set()).update(record_stats(explorer_id, interaction_type, neo_name))
+
+        for explorer_id, requirement_types in changed.items():
+            if requirement_types:
+                check_achievements(explorer_id, sorted(requirement_types))
+
+
+def record_stats(explorer_id, interaction_type, neo_name=None):
+    """Atomically bump the user's counters, returning the requirement types that changed"""
+    metrics = INTERACTION_METRICS.get(interaction_type, [])
+    if not metrics:
+        return []
+
+    updates = {}
+    with transaction.atomic():
+        UserStats.objects.get_or_create(explorer_id=explorer_id)
+
+        for metric in metrics:
+            if metric in ('unique_neo_chats', 'neos_viewed'):
+                # Distinct counters only move the first time a NEO shows up
+                if not neo_name:
+                    continue
+                _, created = UserNeoSet.objects.get_or_create(
+                    explorer_id=explorer_id, metric=metric, neo_name=neo_name
+                )
+                if not created:
+                    continue
+            updates[metric] = F(metric) + 1
+
+        if updates:
+            UserStats.objects.filter(explorer_id=explorer_id).update(**updates)
+
+    if updates:
+        invalidate_profile_cache(explorer_id)
+    return list(updates)
+
+
+def record_unfavorite(explorer_id):
+    """Keep favorites_count in step when a favorite is removed"""
+    UserStats.objects.filter(explorer_id=explorer_id, favorites_count__gt=0).update(
+        favorites_count=F('favorites_count') - 1
     )
-    
-    newly_unlocked = []
-    
-    for achievement in available_achievements:
-        if check_single_achievement(user_email, achievement):
-            UserAchievement.objects.create(
-                user_email=user_email,
-                achievement=achievement
-            )
-            newly_unlocked.append(achievement)
-    
+    invalidate_profile_cache(explorer_id)
+
+
+def check_achievements(explorer_id, requirement_types=None):
+    """Check if user has unlocked any new achievements.
+
+    Every metric is read once from the user's stats row and compared against
+    all thresholds in a single query. Pass the requirement types whose
+    counters just changed to skip the rest.
+    """
+    stats = UserStats.objects.filter(explorer_id=explorer_id).first()
+    if stats is None:
+        return []
+
+    if requirement_types is None:
+        requirement_types = REQUIREMENT_TYPES
+
+    # Achievements whose threshold the user's counter has reached
+    reached = Q()
+    for requirement_type in requirement_types:
+        reached |= Q(requirement_type=requirement_type, requirement__lte=getattr(stats, requirement_type))
+
+    newly_unlocked = list(
+        Achievement.objects.filter(reached).exclude(userachievement__explorer=explorer_id)
+    )
+
+    if newly_unlocked:
+        # A concurrent request may unlock the same achievement, which is fine
+        UserAchievement.objects.bulk_create(
+            [UserAchievement(explorer_id=explorer_id, achievement=achievement) for achievement in newly_unlocked],
+            ignore_conflicts=True,
+        )
+        invalidate_profile_cache(explorer_id)
+
     return newly_unlocked
 
 
-def check_single_achievement(user_email, achievement):
-    """Check if a specific achievement should be unlocked"""
-    if achievement.requirement_type == 'chat_questions':
-        count = UserInteraction.objects.filter(
-            user_email=user_email,
-            interaction_type='chat_question'
-        ).count()
-        return count >= achievement.requirement
-    
-    elif achievement.requirement_type == 'unique_neo_chats':
-        count = UserInteraction.objects.filter(
-            user_email=user_email,
-            interaction_type='chat_question'
-        ).values('neo_name').distinct().count()
-        return count >= achievement.requirement
-    
-    elif achievement.requirement_type == 'favorites_count':
-        count = FavoriteNEO.objects.filter(user_email=user_email).count()
-        return count >= achievement.requirement
-    
-    elif achievement.requirement_type == 'neos_viewed':
-        count = UserInteraction.objects.filter(
-            user_email=user_email,
-            interaction_type='neo_viewed'
-        ).values('neo_name').distinct().count()
-        return count >= achievement.requirement
-    
-    elif achievement.requirement_type == 'daily_briefings':
-        count = UserInteraction.objects.filter(
-            user_email=user_email,
-            interaction_type='daily_briefing'
-        ).count()
-        return count >= achievement.requirement
-    
-    return False
+def profile_cache_keys(explorer_id):
+    return [f"user_stats_{explorer_id}", f"user_achievements_{explorer_id}"]
+
 
+def invalidate_profile_cache(explorer_id):
+    """Forget the cached profile data after the user's counters or achievements change"""
+    cache.delete_many(profile_cache_keys(explorer_id))
+
+
+def get_user_stats(explorer_id):
+    """Get comprehensive user statistics, read from the counters and cached until they change"""
+    cache_key = profile_cache_keys(explorer_id)[0]
+    stats = cache.get(cache_key)
+    if stats is not None:
+        return stats
+
+    counters = UserStats.objects.filter(explorer_id=explorer_id).first() or UserStats(explorer_id=explorer_id)
+    achievement_counts = Achievement.objects.aggregate(
+        total_achievements=Count('id'),
+        achievements_count=Count('id', filter=Q(Exists(
+            UserAchievement.objects.filter(explorer_id=explorer_id, achievement=OuterRef('pk'))
+        ))),
+    )
 
-def get_user_stats(user_email):
-    """Get comprehensive user statistics"""
     stats = {
-        'total_questions': UserInteraction.objects.filter(
-            user_email=user_email,
-            interaction_type='chat_question'
-        ).count(),
-        'unique_neos_chatted': UserInteraction.objects.filter(
-            user_email=user_email,
-            interaction_type='chat_question'
-        ).values('neo_name').distinct().count(),
-        'favorites_count': FavoriteNEO.objects.filter(user_email=user_email).count(),
-        'neos_viewed': UserInteraction.objects.filter(
-            user_email=user_email,
-            interaction_type='neo_viewed'
-        ).values('neo_name').distinct().count(),
-        'daily_briefings': UserInteraction.objects.filter(
-            user_email=user_email,
-            interaction_type='daily_briefing'
-        ).count(),
-        'achievements_count': UserAchievement.objects.filter(user_email=user_email).count(),
-        'total_achievements': Achievement.objects.count()
+        'total_questions': counters.chat_questions,
+        'unique_neos_chatted': counters.unique_neo_chats,
+        'favorites_count': counters.favorites_count,
+        'neos_viewed': counters.neos_viewed,
+        'daily_briefings': counters.daily_briefings,
+        'achievements_count': achievement_counts['achievements_count'],
+        'total_achievements': achievement_counts['total_achievements']
     }
+    cache.set(cache_key, stats, PROFILE_CACHE_TTL)
     return stats
 
 
-def get_user_achievements(user_email):
+def get_user_achievements(explorer_id):
     """Get all achievements for a user, both unlocked and locked"""
-    unlocked = UserAchievement.objects.filter(
-        user_email=user_email
-    ).select_related('achievement').order_by('-unlocked_at')
+    cache_key = profile_cache_keys(explorer_id)[1]
+    achievements = cache.get(cache_key)
+    if achievements is not None:
+        return achievements
+
+    unlocked = list(UserAchievement.objects.filter(
+        explorer_id=explorer_id
+    ).select_related('achievement').order_by('-unlocked_at'))
     
-    unlocked_ids = [ua.achievement.id for ua in unlocked]
+    unlocked_ids = {ua.achievement_id for ua in unlocked}
     
-    locked = Achievement.objects.exclude(id__in=unlocked_ids).order_by('category', 'requirement')
+    locked = [
+        achievement for achievement in Achievement.objects.order_by('category', 'requirement')
+        if achievement.id not in unlocked_ids
+    ]
     
-    return {
+    achievements = {
         'unlocked': unlocked,
         'locked': locked
     }
+    cache.set(cache_key, achievements, PROFILE_CACHE_TTL)
+    return achievements
@@ -1,7 +1,15 @@
 from django.contrib import admin
-from .models import FavoriteNEO, UserInteraction, Achievement, UserAchievement
+from .models import Explorer, FavoriteNEO, UserInteraction, Achievement, UserAchievement, NearEarthObject, CloseApproach, FeedDay, GeneratedContent, DailyBriefing, UserStats, UserNeoSet
 
+admin.site.register(Explorer)
 admin.site.register(FavoriteNEO)
 admin.site.register(UserInteraction)
 admin.site.register(Achievement)
 admin.site.register(UserAchievement)
+admin.site.register(NearEarthObject)
+admin.site.register(CloseApproach)
+admin.site.register(FeedDay)
+admin.site.register(GeneratedContent)
+admin.site.register(DailyBriefing)
+admin.site.register(UserStats)
+admin.site.register(UserNeoSet)
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .caching import Namespace
+from .models import GeneratedContent, GenerationLease
+from .singleflight import Group
+
+GEMINI_CACHE_TTL = getattr(settings, 'GEMINI_CACHE_TTL', 30 * 24 * 60 * 60)
+GEMINI_CACHE_MAX_ENTRIES = getattr(settings, 'GEMINI_CACHE_MAX_ENTRIES', 10000)
+
+# Don't rewrite last_used_at on every hit, once a minute is plenty for LRU
+TOUCH_INTERVAL = timedelta(minutes=1)
+
+# Hot payloads are served from the shared cache in front of the table. Those hits
+# don't touch last_used_at, the table's LRU sees them once a day when they expire.
+generated = Namespace('generated', timeout=24 * 60 * 60)
+
+# How long a worker may hold a generation lease, and how often others check on it
+LEASE_TIMEOUT = getattr(settings, 'GEMINI_LEASE_TIMEOUT', 90)
+LEASE_POLL_INTERVAL = 0.25
+
+# Identical generations running in this process
+generation_flights = Group()
+
+stats = {
+    'generations': 0,  # upstream calls actually made
+    'coalesced_remote': 0,  # calls saved by waiting on another worker
+}
+_stats_lock = threading.Lock()
+
+
+def _number(value, digits):
+    try:
+        return round(float(value), digits)
+    except (TypeError, ValueError):
+        return str(value or '').strip()
+
+
+def normalize_neo(neo):
+    """The NEO fields a prompt depends on, normalized so equal NEOs hash equally"""
+    return {
+        'name': str(neo.get('name') or '').strip(),
+        'diameter': _number(neo.get('diameter'), 0),
+        'speed': _number(neo.get('speed'), 2),
+        'miss_distance': _number(neo.get('miss_distance'), 1),
+        'date': str(neo.get('date') or '').strip(),
+    }
+
+
+def content_key(kind, inputs, prompt_version, model_name):
+    raw = json.dumps({
+        'kind': kind,
+        'inputs': inputs,
+        'prompt_version': prompt_version,
+        'model': model_name,
+    }, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def get(key):
+    """Return the cached payload for key, or None if missing or expired"""
+    payload = generated.get(key)
+    if payload is not None:
+        return payload
+
+    entry = GeneratedContent.objects.filter(key=key).values('id', 'payload', 'created_at', 'last_used_at').first()
+    if entry is None:
+        return None
+
+    now = timezone.now()
+    if entry['created_at'] < now - timedelta(seconds=GEMINI_CACHE_TTL):
+        GeneratedContent.objects.filter(id=entry['id']).delete()
+        return None
+    if entry['last_used_at'] < now - TOUCH_INTERVAL:
+        GeneratedContent.objects.filter(id=entry['id']).update(last_used_at=now)
+    generated.set(key, entry['payload'])
+    return entry['payload']
+
+
+def put(key, kind, model_name, payload):
+    now = timezone.now()
+    try:
+        GeneratedContent.objects.update_or_create(
+            key=key,
+            defaults={'kind': kind, 'model': model_name, 'payload': payload, 'last_used_at': now},
+        )
+    except IntegrityError:
+        # Another worker stored the same content first, which is just as good
+        return
+    generated.set(key, payload)
+    evict()
+
+
+def evict():
+    """Drop expired entries, then the least recently used ones above the size cap"""
+    GeneratedContent.objects.filter(
+        created_at__lt=timezone.now() - timedelta(seconds=GEMINI_CACHE_TTL)
+    ).delete()
+
+    overflow = GeneratedContent.objects.count() - GEMINI_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        oldest = GeneratedContent.objects.order_by('last_used_at').values_list('id', flat=True)[:overflow]
+        GeneratedContent.objects.filter(id__in=list(oldest)).delete()
+
+
+def _count(key):
+    with _stats_lock:
+        stats[key] += 1
+
+
+def get_stats():
+    """Upstream generations made and calls saved by coalescing"""
+    with _stats_lock:
+        result = dict(stats)
+    result['coalesced_local'] = generation_flights.shared
+    result['coalesced'] = result['coalesced_local'] + result['coalesced_remote']
+    return result
+
+
+def acquire_lease(key):
+    """Take the lease on key, returning its expires_at (which identifies this holder) or None"""
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=LEASE_TIMEOUT)
+
+    # Take over a lease whose holder died or gave up
+    if GenerationLease.objects.filter(key=key, expires_at__lt=now).update(expires_at=expires_at):
+        return expires_at
+    try:
+        with transaction.atomic():
+            GenerationLease.objects.create(key=key, expires_at=expires_at)
+        return expires_at
+    except IntegrityError:
+        return None
+
+
+def release_lease(key, expires_at):
+    # A holder that overran its lease must not delete the one another worker took over
+    GenerationLease.objects.filter(key=key, expires_at=expires_at).delete()
+
+
+def _generate_once(key, kind, model_name, produce):
+    """Run produce() unless another worker already is, in which case wait for its result"""
+    waited = False
+    while True:
+        lease = acquire_lease(key)
+        if lease:
+            try:
+                # The previous holder may have finished while we were acquiring
+                payload = get(key)
+                if payload is None:
+                    _count('generations')
+                    payload = produce()
+                    if payload:
+                        put(key, kind, model_name, payload)
+                return payload
+            finally:
+                release_lease(key, lease)
+
+        if not waited:
+            waited = True
+            _count('coalesced_remote')
+        while GenerationLease.objects.filter(key=key, expires_at__gte=timezone.now()).exists():
+            time.sleep(LEASE_POLL_INTERVAL)
+
+        payload = get(key)
+        if payload is not None:
+            return payload
+        # The other worker failed without a result, try to generate it ourselves
+
+
+def cached_generation(kind, prompt_version, model_name, key_inputs=None):
+    """Cache a generator function by its normalized inputs.
+
+    By default the function takes a NEO and is keyed by its normalized fields;
+    key_inputs(*args, **kwargs) can return other JSON-able inputs instead.
+    Bump prompt_version whenever the prompt changes so old output is not reused.
+    Identical generations that are already running, in this process or in
+    another worker, are waited for instead of being started again.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            inputs = key_inputs(*args, **kwargs) if key_inputs else normalize_neo(args[0])
+            key = content_key(kind, inputs, prompt_version, model_name)
+            payload = get(key)
+            if payload is not None:
+                return payload
+
+            return generation_flights.do(key, lambda: _generate_once(
+                key, kind, model_name, lambda: func(*args, **kwargs)
+            ))
+        return wrapper
+    return decorator
@@ -0,0 +1,125 @@
+import numpy as np
+
+# Percentiles reported for every numeric field
+PERCENTILES = [10, 25, 50, 75, 90, 99]
+
+HISTOGRAM_BINS = 20
+
+NUMERIC_FIELDS = ['diameter', 'speed', 'miss_distance']
+
+# NASA's potentially hazardous asteroid cut-offs: about 140 m across, passing within
+# 0.05 AU (19.5 lunar distances). A NEO at exactly these, at 20 km/s, scores 0.
+HAZARD_DIAMETER = 140.0
+HAZARD_MISS_DISTANCE = 19.5
+HAZARD_SPEED = 20.0
+
+
+def neo_arrays(columns):
+    """NumPy arrays from the per-field lists of read_neo_columns or neo_columns"""
+    return {
+        'id': np.asarray(columns['id'], dtype=object),
+        'name': np.asarray(columns['name'], dtype=object),
+        'diameter': np.asarray(columns['diameter'], dtype=float),
+        'speed': np.asarray(columns['speed'], dtype=float),
+        'miss_distance': np.asarray(columns['miss_distance'], dtype=float),
+        # Only read for the few NEOs picked out, converting every date to datetime64 costs more than the stats
+        'date': np.asarray(columns['date'], dtype=object),
+    }
+
+
+def hazard_scores(diameter, speed, miss_distance):
+    """log10 of impact energy (diameter^3 * speed^2) over miss distance, relative to the PHA cut-offs.
+
+    0 is a NEO right at the cut-offs, +1 is ten times worse, -1 ten times milder.
+    """
+    diameter = np.maximum(diameter, 1e-3)
+    speed = np.maximum(speed, 1e-3)
+    miss_distance = np.maximum(miss_distance, 1e-6)
+    return (
+        3 * np.log10(diameter / HAZARD_DIAMETER)
+        + 2 * np.log10(speed / HAZARD_SPEED)
+        - np.log10(miss_distance / HAZARD_MISS_DISTANCE)
+    )
+
+
+def potentially_hazardous(diameter, miss_distance):
+    return (diameter >= HAZARD_DIAMETER) & (miss_distance <= HAZARD_MISS_DISTANCE)
+
+
+def histogram(values, bins=HISTOGRAM_BINS, log=False):
+    """Counts and bin edges; log spaces the bins evenly in log10, for values spanning orders of magnitude"""
+    if log:
+        values = np.log10(np.maximum(values, 1e-3))
+    counts, edges = np.histogram(values, bins=bins)
+    if log:
+        edges = 10 ** edges
+    return {'counts': counts.tolist(), 'edges': np.round(edges, 3).tolist()}
+
+
+def percentiles(values):
+    return dict(zip(map(str, PERCENTILES), np.round(np.percentile(values, PERCENTILES), 2).tolist()))
+
+
+def _neo_at(arrays, i, scores):
+    return {
+        'id': arrays['id'][i],
+        'name': arrays['name'][i],
+        'diameter': round(float(arrays['diameter'][i])),
+        'speed': round(float(arrays['speed'][i]), 2),
+        'miss_distance': round(float(arrays['miss_distance'][i]), 1),
+        'date': str(arrays['date'][i]),
+        'hazard_score': round(float(scores[i]), 2),
+    }
+
+
+def neo_stats(columns, bins=HISTOGRAM_BINS):
+    """Extremes, percentiles, histograms and hazard scores for a range, in vectorized passes"""
+    arrays = neo_arrays(columns)
+    count = len(arrays['name'])
+    if count == 0:
+        return {'count': 0, 'extremes': {}, 'fields': {}, 'hazard': {'potentially_hazardous': 0}}
+
+    scores = hazard_scores(arrays['diameter'], arrays['speed'], arrays['miss_distance'])
+
+    extremes = {
+        'largest': _neo_at(arrays, int(np.argmax(arrays['diameter'])), scores),
+        'fastest': _neo_at(arrays, int(np.argmax(arrays['speed'])), scores),
+        'closest': _neo_at(arrays, int(np.argmin(arrays['miss_distance'])), scores),
+        'most_hazardous': _neo_at(arrays, int(np.argmax(scores)), scores),
+    }
+
+    fields = {}
+    for field in NUMERIC_FIELDS:
+        values = arrays[field]
+        fields[field] = {
+            'min': round(float(values.min()), 2),
+            'max': round(float(values.max()), 2),
+            'mean': round(float(values.mean()), 2),
+            'percentiles': percentiles(values),
+            # Sizes run from meters to kilometers
+            'histogram': histogram(values, bins, log=field == 'diameter'),
+        }
+
+    hazard = {
+        'potentially_hazardous': int(potentially_hazardous(arrays['diameter'], arrays['miss_distance']).sum()),
+        'percentiles': percentiles(scores),
+        'histogram': histogram(scores, bins),
+    }
+
+    return {'count': count, 'extremes': extremes, 'fields': fields, 'hazard': hazard}
+
+
+def interesting_indices(diameter, speed, miss_distance, n=3):
+    """Indices of the largest, closest and fastest NEOs, topped up with the next largest, without repeats"""
+    diameter = np.asarray(diameter, dtype=float)
+    if not len(diameter):
+        return []
+
+    picks = []
+    candidates = [np.argmax(diameter), np.argmin(miss_distance), np.argmax(speed), *np.argsort(-diameter, kind='stable')]
+    for i in map(int, candidates):
+        if i not in picks:
+            picks.append(i)
+        if len(picks) == n:
+            break
+    return picks
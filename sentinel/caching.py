@@ -0,0 +1,213 @@
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class TieredCache(BaseCache):
+    """Two cache levels behind Django's cache API.
+
+    L1 is an in-process cache (a LocMemCache, which is an LRU) in front of
+    L2, a cache shared by every worker (file, database or Redis). Reads try
+    L1, then L2, copying L2 hits into L1. Writes and deletes go to both.
+    Entries live in L1 for at most L1_TIMEOUT seconds, which bounds how long
+    a worker can serve a value another worker has since changed or deleted.
+
+        'default': {
+            'BACKEND': 'sentinel.caching.TieredCache',
+            'OPTIONS': {'L1': 'local', 'L2': 'shared', 'L1_TIMEOUT': 10},
+        }
+
+    L1 and L2 are aliases of other CACHES entries and make their own keys,
+    so set KEY_PREFIX and VERSION on those.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l1_alias = options.get('L1', 'local')
+        self._l2_alias = options.get('L2', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 10)
+        self._stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'sets': 0, 'deletes': 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def l1(self):
+        return caches[self._l1_alias]
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    def _l1_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.l1_timeout
+        return min(timeout, self.l1_timeout)
+
+    def _count(self, stat, n=1):
+        with self._stats_lock:
+            self._stats[stat] += n
+
+    def get_stats(self):
+        """Hits per level, misses and writes since the process started"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['l1_hits'] + stats['l2_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['l1_hits'] + stats['l2_hits']) / lookups, 3) if lookups else None
+        return stats
+
+    def get(self, key, default=None, version=None):
+        missing = object()
+        value = self.l1.get(key, missing, version=version)
+        if value is not missing:
+            self._count('l1_hits')
+            return value
+
+        value = self.l2.get(key, missing, version=version)
+        if value is missing:
+            self._count('misses')
+            return default
+
+        self._count('l2_hits')
+        self.l1.set(key, value, self.l1_timeout, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = self.l1.get_many(keys, version=version)
+        self._count('l1_hits', len(found))
+
+        remaining = [key for key in keys if key not in found]
+        if remaining:
+            from_l2 = self.l2.get_many(remaining, version=version)
+            self._count('l2_hits', len(from_l2))
+            self._count('misses', len(remaining) - len(from_l2))
+            if from_l2:
+                self.l1.set_many(from_l2, self.l1_timeout, version=version)
+            found.update(from_l2)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._count('sets')
+        self.l2.set(key, value, timeout, version=version)
+        self.l1.set(key, value, self._l1_timeout(timeout), version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._count('sets', len(data))
+        failed = self.l2.set_many(data, timeout, version=version)
+        self.l1.set_many(
+            {key: value for key, value in data.items() if key not in failed},
+            self._l1_timeout(timeout),
+            version=version,
+        )
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # L2 decides, so only one worker wins
+        added = self.l2.add(key, value, timeout, version=version)
+        if added:
+            self._count('sets')
+            self.l1.set(key, value, self._l1_timeout(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l1.touch(key, self._l1_timeout(timeout), version=version)
+        return self.l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._count('deletes')
+        self.l1.delete(key, version=version)
+        return self.l2.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        self._count('deletes', len(keys))
+        self.l1.delete_many(keys, version=version)
+        self.l2.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self.l1.has_key(key, version=version) or self.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # Counters live in L2 only, a copy in L1 would go stale immediately
+        self.l1.delete(key, version=version)
+        return self.l2.incr(key, delta, version=version)
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+
+class Namespace:
+    """A group of cache keys that are invalidated together.
+
+    Keys are stored as "<name>:<key>" at the namespace's current version,
+    itself a counter in the cache. invalidate() bumps the counter, so every
+    key written before it is simply never read again and ages out.
+    """
+
+    def __init__(self, name, timeout=DEFAULT_TIMEOUT, alias='default'):
+        self.name = name
+        self.timeout = timeout
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _version_key(self):
+        return f"namespace:{self.name}"
+
+    def version(self):
+        version = self.cache.get(self._version_key())
+        if version is None:
+            # Start from the clock so a counter lost to eviction never reuses an old version
+            self.cache.add(self._version_key(), time.time_ns() // 1_000_000, None)
+            version = self.cache.get(self._version_key())
+        return version
+
+    def key(self, key):
+        return f"{self.name}:{key}"
+
+    def get(self, key, default=None):
+        return self.cache.get(self.key(key), default, version=self.version())
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.timeout
+        self.cache.set(self.key(key), value, timeout, version=self.version())
+
+    def delete(self, key):
+        self.cache.delete(self.key(key), version=self.version())
+
+    def get_or_set(self, key, produce, timeout=DEFAULT_TIMEOUT):
+        """Return the cached value for key, or produce(), cache and return it.
+
+        The value is stored at the version it was looked up at, so one produced from
+        data that an invalidate() during produce() replaced is never served afterwards.
+        """
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.timeout
+        version = self.version()
+        missing = object()
+        value = self.cache.get(self.key(key), missing, version=version)
+        if value is missing:
+            value = produce()
+            self.cache.set(self.key(key), value, timeout, version=version)
+        return value
+
+    def invalidate(self):
+        """Drop every key in the namespace by moving to the next version"""
+        try:
+            self.cache.incr(self._version_key())
+        except ValueError:
+            # The counter was evicted, the next version() starts a new one
+            pass
+
+
+def get_stats(alias='default'):
+    """Hit/miss statistics of a TieredCache, or None for other backends"""
+    backend = caches[alias]
+    return backend.get_stats() if isinstance(backend, TieredCache) else None
@@ -0,0 +1,233 @@
+import base64
+import binascii
+import json
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import NearEarthObject, CloseApproach, FeedDay
+
+# How long (seconds) today's and future feed days stay fresh. Past days never change.
+NEO_FEED_TTL = getattr(settings, 'NEO_FEED_TTL', 60 * 60)
+
+
+def days_in_range(start_date, end_date):
+    """Every date from start_date to end_date, both inclusive"""
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+def stale_days(start_date, end_date):
+    """Return the days in the range that have to be (re)fetched from NASA"""
+    today = date.today()
+    cutoff = timezone.now() - timedelta(seconds=NEO_FEED_TTL)
+
+    fetched = dict(
+        FeedDay.objects.filter(date__range=(start_date, end_date)).values_list('date', 'fetched_at')
+    )
+
+    stale = []
+    for day in days_in_range(start_date, end_date):
+        fetched_at = fetched.get(day)
+        if fetched_at is None:
+            stale.append(day)
+        elif day >= today and fetched_at < cutoff:
+            # Today and future days can still gain or lose approaches
+            stale.append(day)
+    return stale
+
+
+def store_feed(start_date, end_date, records):
+    """Write a fetched feed range into the catalog.
+
+    records is a list of (neo_id, neo) pairs where neo is the dict built by
+    nasa._fetch_window. Every day in the range is marked as fetched, even when NASA
+    had nothing for it, so empty days are not fetched again.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        objects = {}
+        for neo_id, neo in records:
+            objects[neo_id] = NearEarthObject(neo_id=neo_id, name=neo['name'], diameter=neo['diameter'])
+        NearEarthObject.objects.bulk_create(
+            objects.values(),
+            update_conflicts=True,
+            unique_fields=['neo_id'],
+            update_fields=['name', 'diameter'],
+        )
+        pks = dict(
+            NearEarthObject.objects.filter(neo_id__in=objects.keys()).values_list('neo_id', 'id')
+        )
+
+        # Replace the approaches of the fetched days so removed objects disappear too
+        CloseApproach.objects.filter(date__range=(start_date, end_date)).delete()
+        approaches = {}
+        for neo_id, neo in records:
+            approach_date = date.fromisoformat(neo['date'])
+            if not start_date <= approach_date <= end_date:
+                continue
+            approaches[(neo_id, approach_date)] = CloseApproach(
+                neo_id=pks[neo_id],
+                date=approach_date,
+                speed=neo['speed'],
+                miss_distance=neo['miss_distance'],
+            )
+        CloseApproach.objects.bulk_create(approaches.values())
+
+        FeedDay.objects.bulk_create(
+            [FeedDay(date=day, fetched_at=now) for day in days_in_range(start_date, end_date)],
+            update_conflicts=True,
+            unique_fields=['date'],
+            update_fields=['fetched_at'],
+        )
+
+
+def _neo_dict(approach):
+    return {
+        "id": approach.neo.neo_id,
+        "name": approach.neo.name,
+        "diameter": round(approach.neo.diameter),
+        "speed": round(approach.speed, 2),
+        "miss_distance": round(approach.miss_distance, 1),
+        "date": approach.date.isoformat(),
+    }
+
+
+def read_neos(start_date, end_date):
+    """Read the NEOs approaching in the range, in the same shape the feed is parsed into"""
+    approaches = CloseApproach.objects.filter(
+        date__range=(start_date, end_date)
+    ).select_related('neo').order_by('date', 'id')
+
+    return [_neo_dict(approach) for approach in approaches]
+
+
+def read_neo(neo_id):
+    """A NEO and its approaches from the catalog, in the shape of nasa.lookup_neo, or None"""
+    neo = NearEarthObject.objects.filter(neo_id=neo_id).first()
+    if neo is None:
+        return None
+    approaches = neo.approaches.order_by('date').values('date', 'speed', 'miss_distance')
+    return {
+        'id': neo.neo_id,
+        'name': neo.name,
+        'diameter': round(neo.diameter),
+        'approaches': [
+            {'date': a['date'].isoformat(), 'speed': round(a['speed'], 2), 'miss_distance': round(a['miss_distance'], 1)}
+            for a in approaches
+        ],
+    }
+
+
+def read_neo_columns(start_date, end_date):
+    """The NEOs approaching in the range as one list per field of NEO_COLUMNS, unrounded, for analytics"""
+    rows = CloseApproach.objects.filter(
+        date__range=(start_date, end_date)
+    ).order_by('date', 'id').values_list(
+        'neo__neo_id', 'neo__name', 'neo__diameter', 'speed', 'miss_distance', 'date'
+    )
+
+    columns = list(zip(*rows)) or [()] * len(NEO_COLUMNS)
+    return {column: list(values) for column, values in zip(NEO_COLUMNS, columns)}
+
+
+# Sort keys clients may use, mapped to CloseApproach lookups
+NEO_FIELDS = {
+    'date': 'date',
+    'diameter': 'neo__diameter',
+    'speed': 'speed',
+    'miss_distance': 'miss_distance',
+}
+
+# Inclusive range filters on the numeric fields, e.g. max_miss_distance=5 for closer than 5 LD
+NEO_FILTERS = [f'{kind}_{field}' for field in NEO_FIELDS if field != 'date' for kind in ('min', 'max')]
+
+NEO_PAGE_SIZE = 24
+NEO_MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(sort, value, approach_id):
+    """Opaque position after the given row, for keyset pagination"""
+    if isinstance(value, date):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, approach_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    """Return the (value, id) a cursor points after, or raise ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, approach_id = json.loads(raw)
+        if sort.lstrip('-') == 'date':
+            value = date.fromisoformat(value)
+        approach_id = int(approach_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError('Invalid cursor') from e
+    if cursor_sort != sort:
+        raise ValueError('Cursor belongs to a different sort order')
+    return value, approach_id
+
+
+def page_neos(start_date, end_date, sort='date', filters=None, cursor=None, page_size=NEO_PAGE_SIZE):
+    """One page of the NEOs approaching in the range, filtered and ordered in the database.
+
+    sort is a key of NEO_FIELDS, prefixed with '-' for descending order.
+    filters maps names from NEO_FILTERS to their bounds. Pages are
+    keyset-paginated: pass the returned cursor to get the next one.
+    Returns (neos, total, next_cursor), next_cursor being None on the last page.
+    """
+    descending = sort.startswith('-')
+    field = NEO_FIELDS.get(sort.lstrip('-'))
+    if field is None:
+        raise ValueError(f'Unknown sort key: {sort}')
+
+    approaches = CloseApproach.objects.filter(date__range=(start_date, end_date))
+    for name, bound in (filters or {}).items():
+        if name not in NEO_FILTERS:
+            raise ValueError(f'Unknown filter: {name}')
+        kind, _, key = name.partition('_')
+        lookup = 'gte' if kind == 'min' else 'lte'
+        approaches = approaches.filter(**{f'{NEO_FIELDS[key]}__{lookup}': bound})
+
+    total = approaches.count()
+
+    if cursor:
+        value, approach_id = decode_cursor(cursor, sort)
+        after = 'lt' if descending else 'gt'
+        approaches = approaches.filter(
+            Q(**{f'{field}__{after}': value}) | Q(**{field: value, f'id__{after}': approach_id})
+        )
+
+    order = [f'-{field}', '-id'] if descending else [field, 'id']
+    rows = list(approaches.select_related('neo').order_by(*order)[:page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        last_value = last.neo.diameter if field == 'neo__diameter' else getattr(last, field)
+        next_cursor = encode_cursor(sort, last_value, last.id)
+
+    return [_neo_dict(approach) for approach in rows], total, next_cursor
+
+
+# Field order of the columnar listing format
+NEO_COLUMNS = ['id', 'name', 'diameter', 'speed', 'miss_distance', 'date']
+
+
+def neo_columns(neos):
+    """The NEO dicts as one list per field, so each key is sent once instead of once per NEO"""
+    return {column: [neo[column] for neo in neos] for column in NEO_COLUMNS}
+
+
+def flag_bitmap(flags):
+    """Pack booleans into bytes, flag i being bit i % 8 (least significant first) of byte i // 8"""
+    bitmap = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            bitmap[i >> 3] |= 1 << (i & 7)
+    return bytes(bitmap)
@@ -0,0 +1,22 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def database_sync_to_async(func):
+    """sync_to_async in the shared thread pool, for code that queries the database.
+
+    Django only expires the connections of request threads, a pool thread would keep its
+    connection past CONN_MAX_AGE or after the server dropped it. Those are closed
+    before and after every call, as the request cycle does.
+    """
+    @functools.wraps(func)
+    def call(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(call, thread_sensitive=False)
@@ -0,0 +1,64 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from .caching import Namespace
+from .models import Explorer
+
+# An email always maps to the same id, so this only bounds how long stale entries live
+EXPLORER_CACHE_TTL = 24 * 60 * 60
+
+
+def explorer_cache_key(email):
+    return f"explorer_id_{email}"
+
+
+def save_explorer(user):
+    """Create or refresh the Explorer for an Auth0 profile at login, returning its id"""
+    explorer, _ = Explorer.objects.update_or_create(
+        email=user['email'],
+        defaults={'name': user.get('name', '')},
+    )
+    cache.set(explorer_cache_key(explorer.email), explorer.id, EXPLORER_CACHE_TTL)
+    return explorer.id
+
+
+def resolve_explorer(user):
+    """Explorer id for an Auth0 profile, from the cache when possible"""
+    explorer_id = cache.get(explorer_cache_key(user['email']))
+    if explorer_id is None:
+        explorer, _ = Explorer.objects.get_or_create(
+            email=user['email'],
+            defaults={'name': user.get('name', '')},
+        )
+        explorer_id = explorer.id
+        cache.set(explorer_cache_key(user['email']), explorer_id, EXPLORER_CACHE_TTL)
+    return explorer_id
+
+
+def get_explorer_id(request):
+    """The signed-in user's Explorer id, resolved once and then kept in the session"""
+    explorer_id = request.session.get('explorer_id')
+    if explorer_id is None:
+        user = request.session.get('user')
+        if not user:
+            return None
+        # Sessions started before explorers existed
+        explorer_id = resolve_explorer(user)
+        request.session['explorer_id'] = explorer_id
+    return explorer_id
+
+
+async def aget_explorer_id(request):
+    explorer_id = await request.session.aget('explorer_id')
+    if explorer_id is None:
+        user = await request.session.aget('user')
+        if not user:
+            return None
+        explorer_id = await sync_to_async(resolve_explorer)(user)
+        await request.session.aset('explorer_id', explorer_id)
+    return explorer_id
+
+
+def favorites_namespace(explorer_id):
+    """Versioned whenever the explorer's favorites change, for response validators"""
+    return Namespace(f"favorites:{explorer_id}")
@@ -1,15 +1,75 @@
 import os
+import threading
+import time
+import zlib
+from datetime import date
 from dotenv import load_dotenv
 import google.generativeai as genai
+from django.conf import settings
+
+from .ai_cache import cached_generation, normalize_neo
+from .db import database_sync_to_async
+from .analytics import interesting_indices
 
 load_dotenv()
 
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-# generates a quick summary about the neo
-def summarize_asteroid(neo):
+# Which model (and generation config) each task uses
+MODEL_TIERS = settings.GEMINI_MODEL_TIERS
+
+_models = {}
+_models_lock = threading.Lock()
+
+# Per timing key call count and total latency, to compare tiers per endpoint.
+# Keys are tasks, or a task and a suffix ('chat:stream') for variants of it.
+timings = {}
+_timings_lock = threading.Lock()
+
+
+def model_name(task):
+    return MODEL_TIERS[task.partition(':')[0]]['model']
+
+
+def get_model(task):
+    """Return the GenerativeModel for a task, created once and reused"""
+    model = _models.get(task)
+    if model is None:
+        with _models_lock:
+            model = _models.get(task)
+            if model is None:
+                tier = MODEL_TIERS[task]
+                config = {key: value for key, value in tier.items() if key != 'model'}
+                model = genai.GenerativeModel(model_name=tier['model'], generation_config=config or None)
+                _models[task] = model
+    return model
+
+
+def _record(task, started):
+    elapsed_ms = (time.monotonic() - started) * 1000
+    with _timings_lock:
+        entry = timings.setdefault(task, {'calls': 0, 'total_ms': 0.0})
+        entry['calls'] += 1
+        entry['total_ms'] += elapsed_ms
+
+
+def get_timings():
+    """Calls and average latency per task, with the model each task uses"""
+    with _timings_lock:
+        return {
+            task: {
+                'model': model_name(task),
+                'calls': entry['calls'],
+                'avg_ms': round(entry['total_ms'] / entry['calls']),
+            }
+            for task, entry in timings.items()
+        }
+
+# generates the summary and the fun descriptions for the neo in a single call
+@cached_generation('insights', prompt_version=1, model_name=model_name('insights'))
+def generate_neo_insights(neo):
     prompt = f"""
-You are a space expert. Summarize this asteroid in plain English:
+You are Quackstronaut, a friendly space duck and space expert talking to kids aged 8-12. Look at this asteroid:
 
 Name: {neo['name']}
 Estimated diameter: {neo['diameter']} meters
@@ -17,48 +77,48 @@ Relative speed: {neo['speed']} km/s
 Miss distance: {neo['miss_distance']} lunar distances
 Close approach date: {neo['date']}
 
-Be concise, simple, and slightly fun.
-"""
+Reply with exactly these 5 lines and nothing else:
+SUMMARY: [a plain English summary of this asteroid in one paragraph, concise, simple, and slightly fun]
+SIZE: [fun description about its size, max 15 words]
+SPEED: [fun description about its speed, max 15 words]
+DISTANCE: [fun description about its distance, max 15 words]
+DATE: [fun description about its visit date, max 15 words]
 
-    model = genai.GenerativeModel(model_name="models/gemini-2.5-pro")
-    response = model.generate_content(prompt)
+Make the descriptions kid-friendly, funny, and use simple comparisons kids understand!
+"""
 
-    return response.text.strip()
+    started = time.monotonic()
+    response = get_model('insights').generate_content(prompt)
+    _record('insights', started)
 
-# generates fun descriptions for each of the chracteristics of the neo
-def generate_fun_descriptions(neo):
-    prompt = f"""
-You are Quackstronaut, a friendly space duck character talking to kids aged 8-12. Generate 4 SHORT, fun, and humorous descriptions (each max 15 words) for this asteroid's features:
+    return parse_insights(response.text)
 
-Asteroid: {neo['name']}
-Size: {neo['diameter']} meters
-Speed: {neo['speed']} km/s  
-Distance: {neo['miss_distance']} lunar distances
-Date: {neo['date']}
 
-Create exactly 4 descriptions in this format:
-SIZE: [fun description about its size]
-SPEED: [fun description about its speed]  
-DISTANCE: [fun description about its distance]
-DATE: [fun description about its visit date]
+def parse_insights(text):
+    """Split a SUMMARY/SIZE/SPEED/DISTANCE/DATE response into summary and descriptions"""
+    sections = {}
+    current = None
+    for line in text.strip().split('\n'):
+        key, sep, value = line.partition(':')
+        key = key.strip().strip('*').strip().lower()
+        if sep and key in ('summary', 'size', 'speed', 'distance', 'date'):
+            current = key
+            sections[current] = value.strip().strip('*').strip()
+        elif current and line.strip():
+            # The summary may wrap over more than one line
+            sections[current] = f"{sections[current]} {line.strip()}".strip()
 
-Make them kid-friendly, funny, and use simple comparisons kids understand!
-"""
+    if not sections:
+        return {}
 
-    model = genai.GenerativeModel(model_name="models/gemini-2.5-pro")
-    response = model.generate_content(prompt)
-    
-    descriptions = {}
-    for line in response.text.strip().split('\n'):
-        if ':' in line:
-            key, desc = line.split(':', 1)
-            descriptions[key.strip().lower()] = desc.strip()
-    
-    return descriptions
+    return {
+        'summary': sections.pop('summary', ''),
+        'descriptions': sections,
+    }
 
 
-def chat_with_quackstronaut(neo, question):
-    prompt = f"""
+def _chat_prompt(neo, question):
+    return f"""
 You are Quackstronaut, a friendly, enthusiastic space duck companion for kids aged 8-12. You're helping them learn about this specific asteroid:
 
 Asteroid: {neo['name']}
@@ -80,58 +140,129 @@ Respond as Quackstronaut in a fun, encouraging way. Keep it:
 If the question isn't about this asteroid or space, gently redirect to the asteroid topic.
 """
 
-    model = genai.GenerativeModel(model_name="models/gemini-2.5-pro")
-    response = model.generate_content(prompt)
-    
-    return response.text.strip()
 
+# Greetings for the per-user part of the briefing, picked per user and day
+BRIEFING_GREETINGS = [
+    "🦆 Quack quack, {name}! Ready for today's cosmic adventure?",
+    "🦆 Welcome back to the space lab, {name}! Quackstronaut reporting for duty!",
+    "🦆 Good day, Space Cadet {name}! Let's see what's zooming past Earth!",
+]
+
+# Stands in for the user's name in the shared part of the briefing
+NAME_PLACEHOLDER = "[NAME]"
 
-def generate_daily_briefing(user_name, current_neos):
-    # Get today's date
-    from datetime import date
-    today = date.today().strftime("%B %d, %Y")
+
+def _briefing_day(day):
+    return day or date.today()
+
+
+def _interesting_neos(current_neos):
+    # Pick the most interesting NEOs (largest, closest, or fastest)
+    neos = current_neos or []
+    picks = interesting_indices(
+        [float(neo.get('diameter', '0')) for neo in neos],
+        [float(neo.get('speed', '0')) for neo in neos],
+        [float(neo.get('miss_distance', 'inf')) for neo in neos],
+    )
+    return [neos[i] for i in picks]
+
+
+def _briefing_core_inputs(current_neos, day=None):
+    return {
+        'day': _briefing_day(day).isoformat(),
+        'neos': [normalize_neo(neo) for neo in _interesting_neos(current_neos)],
+    }
+
+
+# generates the part of the daily briefing that is the same for everyone, once per day
+@cached_generation('briefing_core', prompt_version=1, model_name=model_name('briefing'),
+                   key_inputs=_briefing_core_inputs)
+def generate_briefing_core(current_neos, day=None):
+    today = _briefing_day(day).strftime("%B %d, %Y")
     
     # Prepare NEO information for the briefing
-    neo_info = ""
-    if current_neos and len(current_neos) > 0:
-        # Pick the most interesting NEOs (largest, closest, or fastest)
-        interesting_neos = sorted(current_neos, key=lambda x: float(x.get('diameter', '0')), reverse=True)[:3]
+    interesting_neos = _interesting_neos(current_neos)
+    if interesting_neos:
         neo_info = "\n".join([f"- {neo['name']}: {neo['diameter']}m wide, flying by at {neo['speed']} km/s on {neo['date']}" 
                              for neo in interesting_neos])
     else:
         neo_info = "- No significant asteroids visiting today, but the cosmos is always full of surprises!"
     
     prompt = f"""
-You are Quackstronaut, the most enthusiastic space duck in the galaxy! Generate a personalized daily space briefing for {user_name} on {today}.
+You are Quackstronaut, the most enthusiastic space duck in the galaxy! Generate today's daily space briefing for {today}. Every CosmoDex explorer gets the same briefing, after a greeting that is added separately.
 
 Today's NEO Activity:
 {neo_info}
 
 Create a fun, engaging daily briefing in BULLET POINT format that includes:
-1. A personalized greeting for {user_name}
-2. Exciting commentary about today's space visitors (or general space facts if no NEOs)
-3. A fun space fact or cosmic trivia
-4. An encouraging message to explore more
+1. Exciting commentary about today's space visitors (or general space facts if no NEOs)
+2. A fun space fact or cosmic trivia
+3. An encouraging message to explore more
 
 Requirements:
-- Keep it under 120 words total
+- Do NOT start with a greeting, it is added before your text
+- Keep it under 100 words total
 - Use Quackstronaut's friendly, excited personality
 - Format as bullet points using ONLY EMOJIS as bullet markers (no • symbols)
-- Make it feel personal and special for {user_name}
+- If you address the explorer by name, write exactly {NAME_PLACEHOLDER} instead of a name
 - Include space puns or duck references when appropriate
 - End with motivation to use CosmoDex today
 - Use emojis strategically as both bullet points and content enhancement
 
 Format example:
-🦆 Quack quack, {user_name}! Ready for today's cosmic adventure?
 🚀 [Space news/NEO info]
 ⭐ Fun fact: [Interesting space trivia]
-🔭 [Encouraging exploration message]
-
-Write it as if Quackstronaut is personally talking to {user_name} in the space lab!
+🔭 [Encouraging exploration message for {NAME_PLACEHOLDER}]
 """
 
-    model = genai.GenerativeModel(model_name="models/gemini-2.5-pro")
-    response = model.generate_content(prompt)
-    
+    started = time.monotonic()
+    response = get_model('briefing').generate_content(prompt)
+    _record('briefing', started)
+
+    return response.text.strip()
+
+
+def personalize_briefing(core, user_name, day=None):
+    """Add the user's greeting and name to the shared briefing, no model call needed"""
+    seed = zlib.crc32(f"{user_name}:{_briefing_day(day).isoformat()}".encode('utf-8'))
+    greeting = BRIEFING_GREETINGS[seed % len(BRIEFING_GREETINGS)].format(name=user_name)
+    return f"{greeting}\n{core.replace(NAME_PLACEHOLDER, user_name)}"
+
+
+def generate_daily_briefing(user_name, current_neos, day=None):
+    return personalize_briefing(generate_briefing_core(current_neos, day), user_name, day)
+
+
+# Async variants for the async views. Gemini calls use the native async client;
+# cached generations go through synchronous DB code, so they run in a worker thread.
+
+async def agenerate_neo_insights(neo):
+    return await database_sync_to_async(generate_neo_insights)(neo)
+
+
+async def achat_with_quackstronaut(neo, question):
+    started = time.monotonic()
+    response = await get_model('chat').generate_content_async(_chat_prompt(neo, question))
+    _record('chat', started)
+
     return response.text.strip()
+
+
+async def astream_with_quackstronaut(neo, question):
+    started = time.monotonic()
+    response = await get_model('chat').generate_content_async(_chat_prompt(neo, question), stream=True)
+    _record('chat:stream', started)
+
+    async for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. safety metadata only)
+            continue
+        if text:
+            yield text
+
+
+async def agenerate_daily_briefing(user_name, current_neos, day=None):
+    core = await database_sync_to_async(generate_briefing_core)(current_neos, day)
+    return personalize_briefing(core, user_name, day)
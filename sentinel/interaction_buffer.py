@@ -0,0 +1,100 @@
+import atexit
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+
+class InteractionBuffer:
+    """Queues interactions in memory and writes them in batches from a background thread.
+
+    A batch is flushed when max_size interactions are waiting or every
+    flush_interval seconds, whichever comes first, and once more when the
+    process exits. Achievements are evaluated at flush time.
+
+    A batch that fails to write is retried on its own at the next flushes,
+    up to max_retries times, and then dropped with its interactions logged.
+    """
+
+    def __init__(self, max_size=100, flush_interval=2.0, max_retries=3):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._pending = []
+        self._retry = None  # (batch, failed attempts) of the batch that last failed
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def add(self, explorer_id, interaction_type, neo_name=None):
+        with self._lock:
+            self._pending.append((explorer_id, interaction_type, neo_name))
+            full = len(self._pending) >= self.max_size
+            if self._thread is None:
+                self._start()
+        if full:
+            self._wake.set()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name='interaction-buffer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+        connection.close()
+
+    def flush(self):
+        """Write everything queued so far, returning the number of interactions written"""
+        from .achievements import record_interactions
+
+        with self._flush_lock:
+            with self._lock:
+                if self._retry is not None:
+                    (batch, attempts), self._retry = self._retry, None
+                else:
+                    batch, self._pending, attempts = self._pending, [], 0
+            if not batch:
+                return 0
+
+            try:
+                # Atomic, so nothing of a failed batch was written
+                record_interactions(batch)
+            except Exception as e:
+                attempts += 1
+                if attempts > self.max_retries:
+                    self.dropped += len(batch)
+                    print(f"Dropping {len(batch)} interactions after {attempts} failed flushes: {e}\n{batch}")
+                else:
+                    print(f"Error flushing interactions, will retry: {e}")
+                    self._retry = (batch, attempts)
+                return 0
+            return len(batch)
+
+    def stop(self):
+        """Stop the background thread and flush what is left"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 5)
+        # A batch being retried is flushed on its own, so the queue can take more than one flush
+        for _ in range(self.max_retries + 2):
+            self.flush()
+            if self._retry is None and not self._pending:
+                break
+
+
+INTERACTION_BUFFER = getattr(settings, 'INTERACTION_BUFFER', {})
+
+# None when buffering is off and interactions are written inside the request
+buffer = InteractionBuffer(
+    max_size=INTERACTION_BUFFER.get('MAX_SIZE', 100),
+    flush_interval=INTERACTION_BUFFER.get('FLUSH_INTERVAL', 2.0),
+    max_retries=INTERACTION_BUFFER.get('MAX_RETRIES', 3),
+) if INTERACTION_BUFFER.get('ENABLED') else None
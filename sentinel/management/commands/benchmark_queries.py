@@ -0,0 +1,178 @@
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from sentinel.models import FavoriteNEO, UserInteraction, UserNeoSet, UserStats
+
+INTERACTION_TYPES = ['chat_question', 'neo_viewed', 'neos_view', 'daily_briefing', 'neo_favorited']
+
+# Tables the hot queries read, created with the same DDL the migrations produce
+MODELS = [UserInteraction, UserStats, UserNeoSet, FavoriteNEO]
+
+# Interactions inserted one at a time to measure what the indexes cost each write
+WRITE_SAMPLE = 2_000
+
+
+class Command(BaseCommand):
+    help = ('Seed a scratch SQLite database with synthetic users and report EXPLAIN QUERY PLAN and '
+            'timings of the hot queries, and the cost of an interaction write, before and after the indexes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Synthetic interactions to seed')
+        parser.add_argument('--users', type=int, default=10_000, help='Distinct users to spread them over')
+        parser.add_argument('--neos', type=int, default=2_000, help='Distinct NEO names')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query, the median is reported')
+        parser.add_argument('--path', help='Scratch database file (a temporary file by default)')
+
+    def handle(self, *args, **options):
+        path = options['path'] or os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+        db = sqlite3.connect(path)
+
+        # Unique constraints are created with the tables, Meta.indexes are built later
+        index_sql = []
+        with connection.schema_editor(collect_sql=True) as editor:
+            for model in MODELS:
+                table_sql, _ = editor.table_sql(model)
+                db.execute(table_sql)
+                # table_sql leaves the unique_together indexes to the deferred statements
+                for statement in editor.deferred_sql:
+                    db.execute(str(statement))
+                editor.deferred_sql.clear()
+                index_sql += [str(index.create_sql(model, editor)) for index in model._meta.indexes]
+
+        self.stdout.write(f"Seeding {options['rows']:,} interactions for {options['users']:,} users into {path}...")
+        started = time.perf_counter()
+        self.seed(db, options)
+        self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s\n")
+
+        queries = self.hot_queries()
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Before indexes'))
+        before = self.run_queries(db, queries, options['repeat'])
+        before['interaction write'] = self.time_writes(db)
+
+        started = time.perf_counter()
+        for sql in index_sql:
+            db.execute(sql)
+        db.execute('ANALYZE')
+        self.stdout.write(f"\nBuilt {len(index_sql)} indexes in {time.perf_counter() - started:.1f}s\n")
+
+        self.stdout.write(self.style.MIGRATE_HEADING('After indexes'))
+        after = self.run_queries(db, queries, options['repeat'])
+        after['interaction write'] = self.time_writes(db)
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nSummary (median ms)'))
+        for label in before:
+            speedup = before[label] / after[label] if after[label] else float('inf')
+            self.stdout.write(f"  {label:<28} {before[label]:>10.3f} -> {after[label]:>8.3f}  ({speedup:,.1f}x)")
+
+        db.close()
+
+    def seed(self, db, options):
+        rng = random.Random(42)
+        now = datetime.now(dt_timezone.utc)
+        users = range(1, options['users'] + 1)
+
+        batch = []
+        neo_sets = set()
+        for _ in range(options['rows']):
+            interaction_type = rng.choice(INTERACTION_TYPES)
+            neo_name = f"({rng.randrange(options['neos'])} Synthetic)" if interaction_type != 'neos_view' else None
+            created_at = now - timedelta(seconds=rng.randrange(90 * 24 * 60 * 60))
+            explorer_id = rng.choice(users)
+            batch.append((explorer_id, interaction_type, neo_name, created_at.isoformat(sep=' ')))
+            if interaction_type in ('chat_question', 'neo_viewed'):
+                metric = 'unique_neo_chats' if interaction_type == 'chat_question' else 'neos_viewed'
+                neo_sets.add((explorer_id, metric, neo_name))
+            if len(batch) == 50_000:
+                self.insert(db, UserInteraction, ['explorer_id', 'interaction_type', 'neo_name', 'created_at'], batch)
+                batch = []
+        self.insert(db, UserInteraction, ['explorer_id', 'interaction_type', 'neo_name', 'created_at'], batch)
+
+        self.insert(db, UserNeoSet, ['explorer_id', 'metric', 'neo_name'], sorted(neo_sets))
+        self.insert(db, UserStats, ['explorer_id', 'chat_questions', 'unique_neo_chats', 'favorites_count',
+                                    'neos_viewed', 'daily_briefings'], [(user, 0, 0, 0, 0, 0) for user in users])
+        self.insert(db, FavoriteNEO, ['explorer_id', 'neo_id', 'name', 'diameter', 'speed', 'miss_distance', 'date'], [
+            (user, str(2000000 + neo), f'({neo} Synthetic)', '100', '10', '20', '2029-04-13')
+            for user in users
+            for neo in rng.sample(range(options['neos']), 5)
+        ])
+        db.execute('ANALYZE')
+
+    def insert(self, db, model, columns, rows):
+        placeholders = ', '.join('?' * len(columns))
+        db.executemany(
+            f'INSERT INTO "{model._meta.db_table}" ({", ".join(columns)}) VALUES ({placeholders})',
+            rows,
+        )
+        db.commit()
+
+    def time_writes(self, db):
+        """Median ms to insert and commit one interaction, as track_user_interaction does"""
+        table = UserInteraction._meta.db_table
+        now = datetime.now(dt_timezone.utc).isoformat(sep=' ')
+        timings = []
+        for i in range(WRITE_SAMPLE):
+            started = time.perf_counter()
+            db.execute(
+                f'INSERT INTO "{table}" (explorer_id, interaction_type, neo_name, created_at) VALUES (?, ?, ?, ?)',
+                (i % 100 + 1, 'neo_viewed', f'({i} Synthetic)', now),
+            )
+            db.commit()
+            timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(f"  interaction write: median {statistics.median(timings):.3f}ms")
+        return statistics.median(timings)
+
+    def hot_queries(self):
+        """The per-request and per-day reads, compiled from the ORM exactly as the app builds them"""
+        now = datetime.now(dt_timezone.utc)
+        since = now - timedelta(days=7)
+        explorer_id = 42
+
+        querysets = {
+            # get_user_stats and check_achievements
+            'user stats': UserStats.objects.filter(explorer_id=explorer_id).values('id'),
+            # record_stats, once per NEO-scoped interaction
+            'NEO set lookup': UserNeoSet.objects.filter(
+                explorer_id=explorer_id, metric='neos_viewed', neo_name='(7 Synthetic)'
+            ).values('id'),
+            # favorites page and the NEO listing's favorite flags
+            'favorites listing': FavoriteNEO.objects.filter(explorer_id=explorer_id).values('name'),
+            # the detail page's favorite button
+            'favorite check': FavoriteNEO.objects.filter(explorer_id=explorer_id, name='(7 Synthetic)').values('id'),
+            # pregenerate_briefings
+            'active users (7 days)': UserInteraction.objects.filter(
+                created_at__range=(since, now)
+            ).values_list('explorer_id', flat=True).distinct(),
+        }
+
+        queries = {}
+        for label, queryset in querysets.items():
+            sql, params = queryset.query.get_compiler(connection=connection).as_sql()
+            # Django's sqlite backend swaps the placeholders the same way
+            sql = sql.replace('%s', '?')
+            queries[label] = (f'SELECT COUNT(*) FROM ({sql})', params)
+        return queries
+
+    def run_queries(self, db, queries, repeat):
+        medians = {}
+        for label, (sql, params) in queries.items():
+            plan = db.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                result = db.execute(sql, params).fetchone()[0]
+                timings.append((time.perf_counter() - started) * 1000)
+            medians[label] = statistics.median(timings)
+
+            self.stdout.write(f"  {label}: {result:,} rows, median {medians[label]:.3f}ms")
+            for step in plan:
+                self.stdout.write(f"      {step[-1]}")
+        return medians
@@ -0,0 +1,134 @@
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment
+
+from sentinel.catalog import NEO_MAX_PAGE_SIZE, store_feed
+from sentinel.middleware import brotli
+from sentinel.views import msgpack
+from sentinel.models import DailyBriefing, Explorer
+
+# Far enough ahead that NASA has no feed for it, the seeded one is served as is
+BENCHMARK_DAY = date(2099, 1, 1)
+
+
+class Command(BaseCommand):
+    help = ('Serve the JSON APIs from a scratch database with a synthetic feed and report bytes on '
+            'the wire and server time per request, uncompressed, gzip, brotli and revalidated (304)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--neos', type=int, default=500, help='Synthetic NEOs in the feed')
+        parser.add_argument('--requests', type=int, default=50, help='Requests per variant, the median is reported')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('benchmark_responses seeds a scratch SQLite database, DB_ENGINE is not SQLite')
+
+        directory = tempfile.mkdtemp()
+        original = dict(connection.settings_dict)
+        # Keep the scratch data out of the real shared cache
+        scratch_cache = override_settings(CACHES={
+            **settings.CACHES,
+            'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-l2'},
+        })
+        scratch_cache.enable()
+        try:
+            connections.close_all()
+            connection.settings_dict['NAME'] = os.path.join(directory, 'responses.sqlite3')
+            call_command('migrate', verbosity=0)
+            client = self.seed(options['neos'])
+
+            listing = (f'/api/neos-data/?start_date={BENCHMARK_DAY}&end_date={BENCHMARK_DAY}'
+                       f'&page_size={NEO_MAX_PAGE_SIZE}')
+            endpoints = {
+                'neos-data': listing,
+                'neos-data columnar': listing + '&format=columnar',
+                'daily-briefing': '/api/daily-briefing/',
+            }
+            if msgpack is not None:
+                endpoints['neos-data msgpack'] = listing + '&format=msgpack'
+            else:
+                self.stdout.write('msgpack is not installed, skipping format=msgpack (pip install -r requirements-optional.txt)')
+            encodings = [('identity', 'identity'), ('gzip', 'gzip')]
+            if brotli is not None:
+                encodings.append(('br', 'br, gzip'))
+            else:
+                self.stdout.write('brotli is not installed, skipping br (pip install -r requirements-optional.txt)\n')
+
+            for endpoint, url in endpoints.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(endpoint))
+                for label, accept_encoding in encodings:
+                    self.measure(client, url, label, options['requests'], {'Accept-Encoding': accept_encoding})
+
+                etag = client.get(url, headers={'Accept-Encoding': 'gzip'})['ETag']
+                self.measure(client, url, '304', options['requests'],
+                             {'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        finally:
+            scratch_cache.disable()
+            connection.settings_dict.clear()
+            connection.settings_dict.update(original)
+            connections.close_all()
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def seed(self, count):
+        rng = random.Random(42)
+        store_feed(BENCHMARK_DAY, BENCHMARK_DAY, [
+            (str(2000000 + i), {
+                'name': f'({2000000 + i} Synthetic)',
+                'diameter': round(rng.uniform(5, 5000)),
+                # Stored as km/s and lunar distances, like the feed
+                'speed': round(rng.uniform(1, 40), 2),
+                'miss_distance': round(rng.uniform(0.1, 200), 1),
+                'date': BENCHMARK_DAY.isoformat(),
+            })
+            for i in range(count)
+        ])
+
+        explorer = Explorer.objects.create(email='benchmark@example.com', name='Benchmark')
+        DailyBriefing.objects.create(
+            explorer=explorer,
+            date=date.today(),
+            user_name=explorer.name,
+            briefing='Quack! ' * 200,
+        )
+
+        # The test client needs 'testserver' in ALLOWED_HOSTS
+        setup_test_environment()
+        client = Client()
+        session = client.session
+        session['user'] = {'email': explorer.email, 'name': explorer.name}
+        session['explorer_id'] = explorer.id
+        session.save()
+        return client
+
+    def measure(self, client, url, label, requests, headers):
+        timings, sizes, decodings = [], [], []
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = client.get(url, headers=headers)
+            timings.append(time.perf_counter() - started)
+            sizes.append(len(response.content))
+
+            # What the client spends parsing an uncompressed body
+            if response.status_code == 200 and not response.has_header('Content-Encoding'):
+                loads = msgpack.unpackb if response['Content-Type'] == 'application/msgpack' else json.loads
+                started = time.perf_counter()
+                loads(response.content)
+                decodings.append(time.perf_counter() - started)
+
+        decode = f'  decode {statistics.median(decodings) * 1000:.3f}ms' if decodings else ''
+        self.stdout.write(
+            f'  {label:<10} {response.status_code}  {statistics.median(sizes):>9,.0f} bytes'
+            f'  {statistics.median(timings) * 1000:>7.2f}ms{decode}'
+        )
@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from sentinel.achievements import track_user_interaction
+from sentinel.models import Explorer
+
+NEO_NAMES = ['Apophis', 'Bennu', 'Ryugu', 'Didymos', 'Eros', 'Itokawa', 'Phaethon', 'Toutatis']
+
+
+def write_interactions(worker, writes):
+    """Log chat questions for one explorer the way the views do, from a worker process"""
+    explorer_id = worker + 1
+    latencies = []
+    locked = 0
+
+    for i in range(writes):
+        write_started = time.perf_counter()
+        try:
+            track_user_interaction(explorer_id, 'chat_question', NEO_NAMES[i % len(NEO_NAMES)])
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            locked += 1
+            continue
+        latencies.append(time.perf_counter() - write_started)
+
+    connections.close_all()
+    return latencies, locked
+
+
+class Command(BaseCommand):
+    help = ('Run concurrent worker processes logging interactions into scratch SQLite databases, '
+            'once with SQLite defaults and once with the tuned SQLITE_OPTIONS, and compare throughput')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent writer processes')
+        parser.add_argument('--writes', type=int, default=200, help='Interactions logged by each worker')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('benchmark_writers compares SQLite configurations, DB_ENGINE is not SQLite')
+
+        directory = tempfile.mkdtemp()
+        original = dict(connection.settings_dict)
+        try:
+            # Migrate once with the default journal, the tuned run switches its copy to WAL
+            template = os.path.join(directory, 'template.sqlite3')
+            self.use_database(template, {})
+            call_command('migrate', verbosity=0)
+            call_command('create_achievements', stdout=StringIO())
+            Explorer.objects.bulk_create([
+                Explorer(id=worker + 1, email=f'writer{worker}@example.com') for worker in range(options['workers'])
+            ])
+            connections.close_all()
+
+            results = {}
+            for label, db_options in [('defaults', {}), ('tuned', settings.SQLITE_OPTIONS)]:
+                path = os.path.join(directory, f'{label}.sqlite3')
+                shutil.copyfile(template, path)
+                self.use_database(path, db_options)
+                results[label] = self.run(label, options['workers'], options['writes'])
+
+            defaults, tuned = results['defaults'], results['tuned']
+            if defaults:
+                self.stdout.write(self.style.SUCCESS(f'\nTuned SQLite: {tuned / defaults:.1f}x the write throughput'))
+        finally:
+            connection.settings_dict.clear()
+            connection.settings_dict.update(original)
+            connections.close_all()
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def use_database(self, path, db_options):
+        connections.close_all()
+        connection.settings_dict['NAME'] = path
+        connection.settings_dict['OPTIONS'] = dict(db_options)
+
+    def run(self, label, workers, writes):
+        # Workers are forked with this process's settings, which now point at the scratch database
+        context = multiprocessing.get_context('fork')
+        started = time.perf_counter()
+        with context.Pool(workers) as pool:
+            outcomes = pool.starmap(write_interactions, [(worker, writes) for worker in range(workers)])
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for worker_latencies, _ in outcomes for latency in worker_latencies)
+        locked = sum(worker_locked for _, worker_locked in outcomes)
+        throughput = len(latencies) / elapsed
+
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(f'  {len(latencies):,} interactions written in {elapsed:.2f}s ({throughput:,.0f}/s)')
+        self.stdout.write(f'  "database is locked" errors: {locked:,}')
+        if latencies:
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(
+                f'  latency median {statistics.median(latencies) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms'
+            )
+        return throughput
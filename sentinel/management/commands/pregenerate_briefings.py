@@ -0,0 +1,55 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sentinel.gemini import generate_briefing_core, personalize_briefing
+from sentinel.models import Explorer, UserInteraction, DailyBriefing
+from sentinel.nasa import get_neos
+
+
+class Command(BaseCommand):
+    help = 'Pre-generate daily briefings for recently active users so their first load is a cache hit'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Briefing date (YYYY-MM-DD), defaults to tomorrow')
+        parser.add_argument('--active-days', type=int, default=7,
+                            help='Include users with an interaction in the last N days')
+
+    def handle(self, *args, **options):
+        day = date.fromisoformat(options['date']) if options['date'] else date.today() + timedelta(days=1)
+        since = timezone.now() - timedelta(days=options['active_days'])
+
+        # Ranges over interaction_created_user, the index covers the explorer ids too
+        active_explorers = set(
+            UserInteraction.objects.filter(
+                created_at__range=(since, timezone.now())
+            ).values_list('explorer_id', flat=True).distinct()
+        )
+        done = set(DailyBriefing.objects.filter(date=day).values_list('explorer_id', flat=True))
+        pending = sorted(active_explorers - done)
+
+        if not pending:
+            self.stdout.write(self.style.SUCCESS(f'All briefings for {day} are already generated'))
+            return
+
+        # The shared part of the briefing is one Gemini call for everyone
+        try:
+            core = generate_briefing_core(get_neos(day, day), day)
+        except Exception as e:
+            raise CommandError(f'Could not generate the briefing for {day}: {e}')
+
+        briefings = []
+        for explorer_id, name in Explorer.objects.filter(id__in=pending).values_list('id', 'name'):
+            user_name = name or 'Explorer'
+            briefings.append(DailyBriefing(
+                explorer_id=explorer_id,
+                user_name=user_name,
+                date=day,
+                briefing=personalize_briefing(core, user_name, day),
+            ))
+        DailyBriefing.objects.bulk_create(briefings, ignore_conflicts=True)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Pre-generated {len(briefings)} briefings for {day}')
+        )
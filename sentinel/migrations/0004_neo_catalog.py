@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sentinel', '0003_achievement_userinteraction_userachievement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NearEarthObject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('neo_id', models.CharField(max_length=20, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('diameter', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CloseApproach',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('speed', models.FloatField()),
+                ('miss_distance', models.FloatField()),
+                ('neo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='approaches', to='sentinel.nearearthobject')),
+            ],
+            options={
+                'unique_together': {('neo', 'date')},
+            },
+        ),
+    ]
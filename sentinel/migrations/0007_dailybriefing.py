@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sentinel', '0006_generationlease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBriefing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_email', models.EmailField(max_length=254)),
+                ('user_name', models.CharField(max_length=100)),
+                ('date', models.DateField()),
+                ('briefing', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'unique_together': {('user_email', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:29
+
+from django.db import migrations, models
+
+
+def backfill_user_stats(apps, schema_editor):
+    """Build the counters and distinct NEO sets from existing interactions and favorites"""
+    UserInteraction = apps.get_model('sentinel', 'UserInteraction')
+    FavoriteNEO = apps.get_model('sentinel', 'FavoriteNEO')
+    UserStats = apps.get_model('sentinel', 'UserStats')
+    UserNeoSet = apps.get_model('sentinel', 'UserNeoSet')
+
+    stats = {}
+
+    def row(user_email):
+        if user_email not in stats:
+            stats[user_email] = UserStats(user_email=user_email)
+        return stats[user_email]
+
+    for user_email, count in UserInteraction.objects.filter(
+        interaction_type='chat_question'
+    ).values_list('user_email').annotate(count=models.Count('id')):
+        row(user_email).chat_questions = count
+
+    for user_email, count in UserInteraction.objects.filter(
+        interaction_type='daily_briefing'
+    ).values_list('user_email').annotate(count=models.Count('id')):
+        row(user_email).daily_briefings = count
+
+    for user_email, count in FavoriteNEO.objects.values_list('user_email').annotate(count=models.Count('id')):
+        row(user_email).favorites_count = count
+
+    neo_sets = []
+    for interaction_type, metric in [('chat_question', 'unique_neo_chats'), ('neo_viewed', 'neos_viewed')]:
+        pairs = UserInteraction.objects.filter(
+            interaction_type=interaction_type, neo_name__isnull=False
+        ).values_list('user_email', 'neo_name').distinct()
+        for user_email, neo_name in pairs:
+            neo_sets.append(UserNeoSet(user_email=user_email, metric=metric, neo_name=neo_name))
+            setattr(row(user_email), metric, getattr(row(user_email), metric) + 1)
+
+    UserStats.objects.bulk_create(stats.values(), batch_size=500)
+    UserNeoSet.objects.bulk_create(neo_sets, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sentinel', '0007_dailybriefing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_email', models.EmailField(max_length=254, unique=True)),
+                ('chat_questions', models.PositiveIntegerField(default=0)),
+                ('unique_neo_chats', models.PositiveIntegerField(default=0)),
+                ('favorites_count', models.PositiveIntegerField(default=0)),
+                ('neos_viewed', models.PositiveIntegerField(default=0)),
+                ('daily_briefings', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserNeoSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_email', models.EmailField(max_length=254)),
+                ('metric', models.CharField(max_length=50)),
+                ('neo_name', models.CharField(max_length=100)),
+            ],
+            options={
+                'unique_together': {('user_email', 'metric', 'neo_name')},
+            },
+        ),
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
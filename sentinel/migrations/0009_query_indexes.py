@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sentinel', '0008_userstats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='generatedcontent',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='dailybriefing',
+            index=models.Index(fields=['date', 'user_email'], name='briefing_date_user'),
+        ),
+        migrations.AddIndex(
+            model_name='userinteraction',
+            index=models.Index(fields=['created_at', 'user_email'], name='interaction_created_user'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sentinel', '0009_query_indexes'),
+    ]
+
+    operations = [
+        # Nullable while both keys exist, so the migrations can be reversed
+        migrations.AlterField(
+            model_name='dailybriefing',
+            name='user_email',
+            field=models.EmailField(max_length=254, null=True),
+        ),
+        migrations.AlterField(
+            model_name='favoriteneo',
+            name='user_email',
+            field=models.EmailField(max_length=254, null=True),
+        ),
+        migrations.AlterField(
+            model_name='userachievement',
+            name='user_email',
+            field=models.EmailField(max_length=254, null=True),
+        ),
+        migrations.AlterField(
+            model_name='userinteraction',
+            name='user_email',
+            field=models.EmailField(max_length=254, null=True),
+        ),
+        migrations.AlterField(
+            model_name='userneoset',
+            name='user_email',
+            field=models.EmailField(max_length=254, null=True),
+        ),
+        migrations.AlterField(
+            model_name='userstats',
+            name='user_email',
+            field=models.EmailField(max_length=254, null=True, unique=True),
+        ),
+        migrations.CreateModel(
+            name='Explorer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='dailybriefing',
+            name='explorer',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='sentinel.explorer'),
+        ),
+        migrations.AddField(
+            model_name='favoriteneo',
+            name='explorer',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='sentinel.explorer'),
+        ),
+        migrations.AddField(
+            model_name='userachievement',
+            name='explorer',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='sentinel.explorer'),
+        ),
+        migrations.AddField(
+            model_name='userinteraction',
+            name='explorer',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='sentinel.explorer'),
+        ),
+        migrations.AddField(
+            model_name='userneoset',
+            name='explorer',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='sentinel.explorer'),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='explorer',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='sentinel.explorer'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+EMAIL_KEYED_MODELS = ['FavoriteNEO', 'UserInteraction', 'UserAchievement', 'DailyBriefing', 'UserStats', 'UserNeoSet']
+
+
+def backfill_explorers(apps, schema_editor):
+    """Create an Explorer for every email seen so far and point existing rows at it"""
+    Explorer = apps.get_model('sentinel', 'Explorer')
+    DailyBriefing = apps.get_model('sentinel', 'DailyBriefing')
+
+    emails = set()
+    for model_name in EMAIL_KEYED_MODELS:
+        model = apps.get_model('sentinel', model_name)
+        emails.update(model.objects.values_list('user_email', flat=True).distinct())
+
+    # Briefings are the only place names were stored, newest first
+    names = {}
+    for user_email, user_name in DailyBriefing.objects.order_by('-date').values_list('user_email', 'user_name'):
+        names.setdefault(user_email, user_name)
+
+    Explorer.objects.bulk_create(
+        [Explorer(email=email, name=names.get(email, '')) for email in sorted(emails)],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+    explorer_id = Explorer.objects.filter(email=OuterRef('user_email')).values('id')[:1]
+    for model_name in EMAIL_KEYED_MODELS:
+        model = apps.get_model('sentinel', model_name)
+        model.objects.update(explorer_id=Subquery(explorer_id))
+
+
+def restore_emails(apps, schema_editor):
+    Explorer = apps.get_model('sentinel', 'Explorer')
+
+    email = Explorer.objects.filter(id=OuterRef('explorer_id')).values('email')[:1]
+    for model_name in EMAIL_KEYED_MODELS:
+        model = apps.get_model('sentinel', model_name)
+        model.objects.update(user_email=Subquery(email))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sentinel', '0010_explorer'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_explorers, restore_emails),
+    ]
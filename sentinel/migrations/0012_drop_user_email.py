@@ -0,0 +1,100 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sentinel', '0011_backfill_explorers'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='dailybriefing',
+            name='briefing_date_user',
+        ),
+        migrations.RemoveIndex(
+            model_name='userinteraction',
+            name='interaction_created_user',
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailybriefing',
+            unique_together={('explorer', 'date')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='favoriteneo',
+            unique_together={('explorer', 'name')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='userachievement',
+            unique_together={('explorer', 'achievement')},
+        ),
+        migrations.RemoveField(
+            model_name='userinteraction',
+            name='user_email',
+        ),
+        migrations.AlterUniqueTogether(
+            name='userneoset',
+            unique_together={('explorer', 'metric', 'neo_name')},
+        ),
+        migrations.RemoveField(
+            model_name='userstats',
+            name='user_email',
+        ),
+        migrations.AlterField(
+            model_name='dailybriefing',
+            name='explorer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='sentinel.explorer'),
+        ),
+        migrations.AlterField(
+            model_name='favoriteneo',
+            name='explorer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='sentinel.explorer'),
+        ),
+        migrations.AlterField(
+            model_name='userachievement',
+            name='explorer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='sentinel.explorer'),
+        ),
+        migrations.AlterField(
+            model_name='userinteraction',
+            name='explorer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sentinel.explorer'),
+        ),
+        migrations.AlterField(
+            model_name='userneoset',
+            name='explorer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='sentinel.explorer'),
+        ),
+        migrations.AlterField(
+            model_name='userstats',
+            name='explorer',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='sentinel.explorer'),
+        ),
+        migrations.AddIndex(
+            model_name='dailybriefing',
+            index=models.Index(fields=['date', 'explorer'], name='briefing_date_user'),
+        ),
+        migrations.AddIndex(
+            model_name='userinteraction',
+            index=models.Index(fields=['created_at', 'explorer'], name='interaction_created_user'),
+        ),
+        migrations.RemoveField(
+            model_name='dailybriefing',
+            name='user_email',
+        ),
+        migrations.RemoveField(
+            model_name='favoriteneo',
+            name='user_email',
+        ),
+        migrations.RemoveField(
+            model_name='userachievement',
+            name='user_email',
+        ),
+        migrations.RemoveField(
+            model_name='userneoset',
+            name='user_email',
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:50
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_neo_ids(apps, schema_editor):
+    """Take the NeoWs id of favorites whose NEO is in the catalog"""
+    FavoriteNEO = apps.get_model('sentinel', 'FavoriteNEO')
+    NearEarthObject = apps.get_model('sentinel', 'NearEarthObject')
+
+    neo_id = NearEarthObject.objects.filter(name=OuterRef('name')).values('neo_id')[:1]
+    FavoriteNEO.objects.filter(name__in=NearEarthObject.objects.values('name')).update(neo_id=Subquery(neo_id))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sentinel', '0012_drop_user_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favoriteneo',
+            name='neo_id',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.RunPython(backfill_neo_ids, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,18 @@
 from django.db import models
 
+class Explorer(models.Model):
+    """A signed-in user, so per-user rows key on a small integer instead of the email"""
+    email = models.EmailField(unique=True)
+    name = models.CharField(max_length=100, blank=True)  # Auth0 profile name
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.email
+
+
 class FavoriteNEO(models.Model):
-    user_email = models.EmailField()
+    explorer = models.ForeignKey(Explorer, on_delete=models.CASCADE, db_index=False)  # leads the unique_together index
+    neo_id = models.CharField(max_length=20, blank=True)  # NeoWs id, links to the detail page
     name = models.CharField(max_length=100)
     diameter = models.CharField(max_length=50)
     speed = models.CharField(max_length=50)
@@ -9,21 +20,27 @@ class FavoriteNEO(models.Model):
     date = models.CharField(max_length=50)
 
     class Meta:
-        unique_together = ['user_email', 'name']
+        unique_together = ['explorer', 'name']
 
     def __str__(self):
-        return f"{self.name} - {self.user_email}"
+        return f"{self.name} - {self.explorer.email}"
 
 
 class UserInteraction(models.Model):
     """Track user interactions for achievements"""
-    user_email = models.EmailField()
+    explorer = models.ForeignKey(Explorer, on_delete=models.CASCADE)
     interaction_type = models.CharField(max_length=50)  # 'chat_question', 'neo_favorited', 'neo_viewed'
     neo_name = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Recently active users for pregenerate_briefings (covering)
+            models.Index(fields=['created_at', 'explorer'], name='interaction_created_user'),
+        ]
     
     def __str__(self):
-        return f"{self.user_email} - {self.interaction_type}"
+        return f"{self.explorer.email} - {self.interaction_type}"
 
 
 class Achievement(models.Model):
@@ -42,12 +59,113 @@ class Achievement(models.Model):
 
 class UserAchievement(models.Model):
     """Track which achievements users have unlocked"""
-    user_email = models.EmailField()
+    explorer = models.ForeignKey(Explorer, on_delete=models.CASCADE, db_index=False)  # leads the unique_together index
     achievement = models.ForeignKey(Achievement, on_delete=models.CASCADE)
     unlocked_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        unique_together = ['user_email', 'achievement']
+        unique_together = ['explorer', 'achievement']
     
     def __str__(self):
-        return f"{self.user_email} - {self.achievement.name}"
\ No newline at end of file
+        return f"{self.explorer.email} - {self.achievement.name}"
+
+
+class NearEarthObject(models.Model):
+    """Local copy of a NeoWs object, filled write-through by the NASA client"""
+    neo_id = models.CharField(max_length=20, unique=True)  # NeoWs id
+    name = models.CharField(max_length=100)
+    diameter = models.FloatField()  # estimated max diameter in meters
+
+    def __str__(self):
+        return self.name
+
+
+class CloseApproach(models.Model):
+    """A single close approach of a NEO, one row per object per feed day"""
+    neo = models.ForeignKey(NearEarthObject, on_delete=models.CASCADE, related_name='approaches')
+    date = models.DateField(db_index=True)
+    speed = models.FloatField()  # km/s
+    miss_distance = models.FloatField()  # lunar distances
+
+    class Meta:
+        unique_together = ['neo', 'date']
+
+    def __str__(self):
+        return f"{self.neo.name} - {self.date}"
+
+
+class FeedDay(models.Model):
+    """Records when a feed day was last fetched from NASA"""
+    date = models.DateField(unique=True)
+    fetched_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.date} (fetched {self.fetched_at})"
+
+
+class GeneratedContent(models.Model):
+    """Gemini output cached by a hash of its normalized inputs, prompt version and model"""
+    key = models.CharField(max_length=64, unique=True)  # sha256 hex digest
+    kind = models.CharField(max_length=50)  # 'summary', 'descriptions', ...
+    model = models.CharField(max_length=100)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)  # TTL expiry scans
+    last_used_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.kind} - {self.key[:12]}"
+
+
+class GenerationLease(models.Model):
+    """Marks a Gemini generation in flight so other workers wait for it instead of repeating it"""
+    key = models.CharField(max_length=64, unique=True)  # GeneratedContent key being produced
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key[:12]} until {self.expires_at}"
+
+
+class DailyBriefing(models.Model):
+    """A user's briefing for one day, generated on their first visit or ahead of time"""
+    explorer = models.ForeignKey(Explorer, on_delete=models.CASCADE, db_index=False)  # leads the unique_together index
+    user_name = models.CharField(max_length=100)
+    date = models.DateField()
+    briefing = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(blank=True, null=True)  # first time the user saw it
+
+    class Meta:
+        unique_together = ['explorer', 'date']
+        indexes = [
+            # Briefings already generated for a day (covering)
+            models.Index(fields=['date', 'explorer'], name='briefing_date_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.explorer.email} - {self.date}"
+
+
+class UserStats(models.Model):
+    """Per-user achievement counters, kept up to date as interactions are recorded"""
+    explorer = models.OneToOneField(Explorer, on_delete=models.CASCADE, related_name='stats')
+    chat_questions = models.PositiveIntegerField(default=0)
+    unique_neo_chats = models.PositiveIntegerField(default=0)
+    favorites_count = models.PositiveIntegerField(default=0)
+    neos_viewed = models.PositiveIntegerField(default=0)
+    daily_briefings = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.explorer.email} stats"
+
+
+class UserNeoSet(models.Model):
+    """Distinct NEOs per user behind the unique_neo_chats and neos_viewed counters"""
+    explorer = models.ForeignKey(Explorer, on_delete=models.CASCADE, db_index=False)  # leads the unique_together index
+    metric = models.CharField(max_length=50)  # 'unique_neo_chats' or 'neos_viewed'
+    neo_name = models.CharField(max_length=100)
+
+    class Meta:
+        unique_together = ['explorer', 'metric', 'neo_name']
+
+    def __str__(self):
+        return f"{self.explorer.email} - {self.metric} - {self.neo_name}"
@@ -1,40 +1,89 @@
 import os
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 
-NASA_API_KEY = os.getenv("NASA_API_KEY")
+from django.conf import settings
+from django.core.cache import cache
 
-def fetch_neos(start_date=None, end_date=None):
+from .analytics import HISTOGRAM_BINS, neo_stats
+from .caching import Namespace
+from .catalog import NEO_FEED_TTL, NEO_PAGE_SIZE, stale_days, store_feed, read_neo, read_neos, read_neo_columns, page_neos
+from .db import database_sync_to_async
+from .neows import client as neows, NeoWsUnavailable
+from .singleflight import Group
+
+NASA_FEED_WORKERS = int(os.getenv("NASA_FEED_WORKERS", 4))
+
+# Widest range (in days, inclusive) the NeoWs feed accepts in one request
+NEO_FEED_MAX_DAYS = 7
+
+# Widest range (in days, inclusive) a listing may ask for, every missing day of it is fetched from NASA
+NEO_MAX_RANGE_DAYS = getattr(settings, 'NEO_MAX_RANGE_DAYS', 90)
+
+# Widest range stats may ask for. Ranges wider than NEO_MAX_RANGE_DAYS are not refreshed,
+# their stats cover what the catalog already holds.
+NEO_STATS_MAX_RANGE_DAYS = getattr(settings, 'NEO_STATS_MAX_RANGE_DAYS', 10 * 366)
+
+# In-flight feed day fetches, keyed by date
+feed_flights = Group()
+
+# Catalog reads by date range, all dropped whenever new feed data is stored.
+# v2: NEO dicts carry the NeoWs id.
+neo_reads = Namespace('neo_reads:v2', timeout=NEO_FEED_TTL)
+
+# Seconds a NeoWs lookup of one NEO is cached. Orbits and approach lists change rarely.
+NEO_LOOKUP_TTL = getattr(settings, 'NEO_LOOKUP_TTL', 24 * 60 * 60)
+
+# In-flight NeoWs lookups, keyed by NEO id
+lookup_flights = Group()
+
+
+def _parse_dates(start_date, end_date, max_days=NEO_MAX_RANGE_DAYS):
     if start_date is None:
         start_date = date.today()
     if end_date is None:
         end_date = start_date + timedelta(days=1)
-    
+
     # Convert string dates to date objects if needed
     if isinstance(start_date, str):
         start_date = date.fromisoformat(start_date)
     if isinstance(end_date, str):
         end_date = date.fromisoformat(end_date)
 
-    url = "https://api.nasa.gov/neo/rest/v1/feed"
-    params = {
-        "start_date": start_date.isoformat(),
-        "end_date": end_date.isoformat(),
-        "api_key": NASA_API_KEY
-    }
+    if end_date < start_date:
+        raise ValueError('end_date is before start_date')
+    if (end_date - start_date).days + 1 > max_days:
+        raise ValueError(f'Date range is longer than {max_days} days')
+
+    return start_date, end_date
+
+
+def _feed_windows(start_date, end_date):
+    """Split a date range into windows the NeoWs feed accepts"""
+    windows = []
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = min(window_start + timedelta(days=NEO_FEED_MAX_DAYS - 1), end_date)
+        windows.append((window_start, window_end))
+        window_start = window_end + timedelta(days=1)
+    return windows
 
+
+def _fetch_window(start_date, end_date):
+    """Fetch one feed window, returning (neo_id, neo) records or None on failure"""
     try:
-        res = requests.get(url, params=params)
-        res.raise_for_status()  # Raise an exception for bad status codes
-        data = res.json()
-    except requests.exceptions.RequestException as e:
+        data = neows.feed(start_date, end_date)
+    except NeoWsUnavailable as e:
+        # NASA is degraded, callers fall back to whatever the catalog has
+        print(f"NeoWs unavailable: {e}")
+        return None
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"Error fetching NEO data: {e}")
-        return []
-    except KeyError as e:
-        print(f"Error parsing NEO data: {e}")
-        return []
+        return None
 
-    neos = []
+    records = []
 
     for neo_date in data.get("near_earth_objects", {}):
         for obj in data["near_earth_objects"][neo_date]:
@@ -45,15 +94,257 @@ def fetch_neos(start_date=None, end_date=None):
                 miss_distance = obj["close_approach_data"][0]["miss_distance"]["lunar"]
                 approach_date = obj["close_approach_data"][0]["close_approach_date"]
 
-                neos.append({
+                records.append((obj["id"], {
+                    "id": obj["id"],
                     "name": name,
                     "diameter": round(float(diameter)),
                     "speed": round(float(speed), 2),
                     "miss_distance": round(float(miss_distance), 1),
                     "date": approach_date
-                })
+                }))
             except (KeyError, IndexError, ValueError) as e:
                 print(f"Error processing NEO object: {e}")
                 continue
 
-    return neos
+    return records
+
+
+def _parse_lookup(data):
+    """The fields the detail page uses from a NeoWs lookup, with the Earth approaches oldest first"""
+    approaches = []
+    for approach in data.get("close_approach_data", []):
+        if approach.get("orbiting_body") != "Earth":
+            continue
+        try:
+            approaches.append({
+                "date": approach["close_approach_date"],
+                "speed": round(float(approach["relative_velocity"]["kilometers_per_second"]), 2),
+                "miss_distance": round(float(approach["miss_distance"]["lunar"]), 1),
+            })
+        except (KeyError, ValueError) as e:
+            print(f"Error processing NEO approach: {e}")
+    approaches.sort(key=lambda approach: approach["date"])
+
+    diameter = data["estimated_diameter"]["meters"]
+    return {
+        "id": data["id"],
+        "name": data["name"],
+        "diameter": round(float(diameter["estimated_diameter_max"])),
+        "diameter_min": round(float(diameter["estimated_diameter_min"])),
+        "absolute_magnitude": data.get("absolute_magnitude_h"),
+        "hazardous": data.get("is_potentially_hazardous_asteroid", False),
+        "jpl_url": data.get("nasa_jpl_url"),
+        "approaches": approaches,
+    }
+
+
+def _lookup(neo_id):
+    try:
+        record = _parse_lookup(neows.lookup(neo_id))
+    except NeoWsUnavailable as e:
+        # NASA is degraded, fall back to what the feed stored (not cached, so NASA is asked again)
+        print(f"NeoWs unavailable: {e}")
+        return read_neo(neo_id)
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            # Remembered for a while so unknown ids don't reach NASA on every request
+            cache.set(f"neo_lookup:{neo_id}", False, NEO_FEED_TTL)
+            return None
+        print(f"Error looking up NEO {neo_id}: {e}")
+        return read_neo(neo_id)
+    except (KeyError, ValueError) as e:
+        print(f"Error processing NEO {neo_id}: {e}")
+        return read_neo(neo_id)
+
+    record["fetched_at"] = int(time.time())
+    cache.set(f"neo_lookup:{neo_id}", record, NEO_LOOKUP_TTL)
+    return record
+
+
+def lookup_neo(neo_id):
+    """Full record of one NEO by NeoWs id, from the cache or NeoWs, or None if NASA doesn't know it.
+
+    Concurrent lookups of the same NEO wait on one in-flight request.
+    """
+    neo_id = str(neo_id)
+    record = cache.get(f"neo_lookup:{neo_id}")
+    if record is None:
+        record = lookup_flights.do(neo_id, lambda: _lookup(neo_id))
+    return record or None
+
+
+def get_neo(neo_id, on=None):
+    """One NEO for the detail page: its record plus the approach on date on.
+
+    Without a matching approach, the next one from today is used, or the latest
+    past one. Returns None for unknown NEOs.
+    """
+    record = lookup_neo(neo_id)
+    if record is None:
+        return None
+
+    approaches = record["approaches"]
+    today = date.today().isoformat()
+    approach = (
+        next((a for a in approaches if a["date"] == on), None)
+        or next((a for a in approaches if a["date"] >= today), None)
+        or (approaches[-1] if approaches else {"date": None, "speed": None, "miss_distance": None})
+    )
+    return {**record, **approach}
+
+
+def _fetch_windows(windows):
+    """Fetch feed windows concurrently, store them and return the merged NEOs"""
+    if len(windows) == 1:
+        results = [_fetch_window(*windows[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(NASA_FEED_WORKERS, len(windows))) as pool:
+            results = list(pool.map(lambda window: _fetch_window(*window), windows))
+
+    records = []
+    seen = set()
+    stored = False
+
+    for (window_start, window_end), window_records in zip(windows, results):
+        if window_records is None:
+            continue
+
+        # Write-through to the local catalog so later reads skip NASA.
+        # Done here rather than in the workers so all DB writes share one thread.
+        try:
+            store_feed(window_start, window_end, window_records)
+            stored = True
+        except Exception as e:
+            print(f"Error storing NEO data: {e}")
+
+        for neo_id, neo in window_records:
+            if (neo_id, neo["date"]) in seen:
+                continue
+            seen.add((neo_id, neo["date"]))
+            records.append((neo_id, neo))
+
+    if stored:
+        neo_reads.invalidate()
+
+    records.sort(key=lambda record: record[1]["date"])
+    return [neo for _, neo in records]
+
+
+def _fetch_days(days):
+    """Fetch only the given days, grouping consecutive ones into feed windows"""
+    windows = []
+    for run_start, run_end in _contiguous_runs(days):
+        windows.extend(_feed_windows(run_start, run_end))
+    _fetch_windows(windows)
+
+
+def _contiguous_runs(days):
+    runs = []
+    for day in sorted(days):
+        if runs and day == runs[-1][1] + timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
+
+
+def _refresh(start_date, end_date):
+    stale = stale_days(start_date, end_date)
+    if stale:
+        feed_flights.do_many(stale, _fetch_days)
+
+
+def get_neos(start_date=None, end_date=None):
+    """Return the NEOs for a date range from the local catalog.
+
+    The catalog is kept per day: only days that were never fetched, or
+    today/future days older than NEO_FEED_TTL, go out to NASA, so
+    overlapping ranges share what earlier requests already stored.
+    Concurrent requests missing the same day wait on one in-flight fetch.
+    Reads are cached per range until the next feed data is stored.
+    """
+    start_date, end_date = _parse_dates(start_date, end_date)
+    _refresh(start_date, end_date)
+
+    return neo_reads.get_or_set(f"{start_date}:{end_date}", lambda: read_neos(start_date, end_date))
+
+
+def feed_version(start_date=None, end_date=None):
+    """Refresh the range and return the catalog version, which changes whenever feed data is stored"""
+    start_date, end_date = _parse_dates(start_date, end_date)
+    _refresh(start_date, end_date)
+    return neo_reads.version()
+
+
+def get_neo_page(start_date=None, end_date=None, sort='date', filters=None, cursor=None,
+                 page_size=NEO_PAGE_SIZE, refresh=True):
+    """Like get_neos, but one filtered and sorted page: (neos, total, next_cursor), see page_neos.
+
+    Pass refresh=False when feed_version() has just refreshed the range.
+    """
+    start_date, end_date = _parse_dates(start_date, end_date)
+    if refresh:
+        _refresh(start_date, end_date)
+
+    filters = filters or {}
+    key = ':'.join([
+        'page', str(start_date), str(end_date), sort, cursor or '', str(page_size),
+        *(f'{name}={filters[name]}' for name in sorted(filters)),
+    ])
+    return neo_reads.get_or_set(
+        key, lambda: page_neos(start_date, end_date, sort, filters, cursor, page_size)
+    )
+
+
+def _refresh_stats_range(start_date, end_date):
+    start_date, end_date = _parse_dates(start_date, end_date, NEO_STATS_MAX_RANGE_DAYS)
+    if (end_date - start_date).days + 1 <= NEO_MAX_RANGE_DAYS:
+        _refresh(start_date, end_date)
+    return start_date, end_date
+
+
+def stats_version(start_date=None, end_date=None):
+    """feed_version for get_neo_stats, which allows wider ranges and refreshes only listing-sized ones"""
+    _refresh_stats_range(start_date, end_date)
+    return neo_reads.version()
+
+
+def get_neo_stats(start_date=None, end_date=None, bins=HISTOGRAM_BINS, refresh=True):
+    """Analytics over the NEOs of a range (see analytics.neo_stats), cached like the reads.
+
+    Pass refresh=False when stats_version() has just refreshed the range.
+    """
+    if refresh:
+        start_date, end_date = _refresh_stats_range(start_date, end_date)
+    else:
+        start_date, end_date = _parse_dates(start_date, end_date, NEO_STATS_MAX_RANGE_DAYS)
+
+    return neo_reads.get_or_set(
+        f"stats:{start_date}:{end_date}:{bins}",
+        lambda: neo_stats(read_neo_columns(start_date, end_date), bins),
+    )
+
+
+async def aget_neos(start_date=None, end_date=None):
+    """get_neos for async views, run in a worker thread off the event loop"""
+    return await database_sync_to_async(get_neos)(start_date, end_date)
+
+
+async def afeed_version(start_date=None, end_date=None):
+    return await database_sync_to_async(feed_version)(start_date, end_date)
+
+
+async def astats_version(start_date=None, end_date=None):
+    return await database_sync_to_async(stats_version)(start_date, end_date)
+
+
+async def aget_neo_page(*args, **kwargs):
+    return await database_sync_to_async(get_neo_page)(*args, **kwargs)
+
+
+async def aget_neo(neo_id, on=None):
+    return await database_sync_to_async(get_neo)(neo_id, on)
+
+
+async def aget_neo_stats(*args, **kwargs):
+    return await database_sync_to_async(get_neo_stats)(*args, **kwargs)
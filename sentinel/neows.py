@@ -0,0 +1,183 @@
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+NASA_API_KEY = os.getenv("NASA_API_KEY")
+NEOWS_BASE_URL = "https://api.nasa.gov/neo/rest/v1"
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class NeoWsUnavailable(Exception):
+    """Raised when NeoWs could not be reached or the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops calling NeoWs after repeated failures and retries after a cool-down.
+
+    closed -> open after failure_threshold consecutive failures,
+    open -> half-open once reset_timeout seconds have passed (one trial call),
+    half-open -> closed on success or back to open on failure.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        """Return True if a call may go through right now"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        """Count a failure, returning True if this failure tripped the breaker"""
+        with self._lock:
+            self.failures += 1
+            was_trial = self._trial_running
+            self._trial_running = False
+            if was_trial or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class NeoWsClient:
+    """Pooled, timeout-bounded and retrying client for the NASA NeoWs API"""
+
+    def __init__(self, api_key=None, connect_timeout=3.05, read_timeout=10, max_retries=3,
+                 backoff_base=0.5, backoff_cap=8, pool_size=10, breaker=None):
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = breaker or CircuitBreaker()
+
+        # One keep-alive session so calls reuse TLS connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'breaker_trips': 0,
+            'short_circuits': 0,
+        }
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['breaker_state'] = self.breaker.state
+        return stats
+
+    def _backoff(self, attempt, retry_after=None):
+        """Seconds to wait before the next attempt (full jitter, honoring Retry-After)"""
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def get(self, path, params=None):
+        """GET a NeoWs path and return the decoded JSON body"""
+        if not self.breaker.allow():
+            self._count('short_circuits')
+            raise NeoWsUnavailable("NeoWs circuit breaker is open")
+
+        params = dict(params or {})
+        params["api_key"] = self.api_key or NASA_API_KEY
+        url = f"{NEOWS_BASE_URL}/{path}"
+
+        error = None
+        retry_after = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count('retries')
+                time.sleep(self._backoff(attempt - 1, retry_after))
+
+            retry_after = None
+            self._count('requests')
+            try:
+                res = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+                continue
+
+            if res.status_code in RETRY_STATUSES:
+                error = requests.exceptions.HTTPError(f"{res.status_code} from NeoWs", response=res)
+                retry_after = res.headers.get("Retry-After")
+                continue
+
+            try:
+                res.raise_for_status()
+                data = res.json()
+            except (requests.exceptions.HTTPError, ValueError):
+                # Client errors are our fault, not NeoWs being degraded
+                self.breaker.record_success()
+                raise
+
+            self.breaker.record_success()
+            return data
+
+        self._count('failures')
+        if self.breaker.record_failure():
+            self._count('breaker_trips')
+        raise NeoWsUnavailable(f"NeoWs request failed after {self.max_retries + 1} attempts: {error}")
+
+    def feed(self, start_date, end_date):
+        return self.get("feed", {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+        })
+
+    def lookup(self, neo_id):
+        """One NEO with its orbit and every recorded close approach"""
+        return self.get(f"neo/{neo_id}")
+
+
+client = NeoWsClient(
+    connect_timeout=float(os.getenv("NASA_CONNECT_TIMEOUT", 3.05)),
+    read_timeout=float(os.getenv("NASA_READ_TIMEOUT", 10)),
+    max_retries=int(os.getenv("NASA_MAX_RETRIES", 3)),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv("NASA_BREAKER_THRESHOLD", 5)),
+        reset_timeout=float(os.getenv("NASA_BREAKER_RESET", 30)),
+    ),
+)
@@ -0,0 +1,73 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Group:
+    """Coalesces concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key runs the work; everyone who asks for the same
+    key while it is running waits and gets the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0  # calls answered by another caller's flight
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def do_many(self, keys, fn):
+        """Run fn(owned_keys) once for the keys nobody else is working on.
+
+        Keys already in flight are waited for instead. Nothing is returned:
+        callers are expected to read the shared result (e.g. from the
+        database) once this returns.
+        """
+        with self._lock:
+            owned = [key for key in keys if key not in self._calls]
+            waiting = [self._calls[key] for key in keys if key in self._calls]
+            calls = [self._calls.setdefault(key, _Call()) for key in owned]
+            self.shared += len(waiting)
+
+        try:
+            if owned:
+                fn(owned)
+        finally:
+            with self._lock:
+                for key in owned:
+                    del self._calls[key]
+            for call in calls:
+                call.event.set()
+
+        for call in waiting:
+            call.event.wait()
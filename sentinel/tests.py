@@ -1,3 +1,799 @@
-from django.test import TestCase
+import base64
+import threading
+import time
+from datetime import date, timedelta
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import requests
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import ai_cache, gemini
+from .achievements import track_user_interaction, check_achievements, get_user_stats
+from .ai_cache import acquire_lease, release_lease
+from .analytics import interesting_indices, neo_stats
+from .caching import Namespace
+from .catalog import page_neos, stale_days, store_feed
+from .db import database_sync_to_async
+from .explorers import get_explorer_id
+from .interaction_buffer import InteractionBuffer
+from .middleware import CompressionMiddleware
+from .models import DailyBriefing, Explorer, FeedDay, GeneratedContent, GenerationLease, UserAchievement, UserInteraction, UserStats
+from .nasa import NEO_MAX_RANGE_DAYS, NEO_STATS_MAX_RANGE_DAYS, _feed_windows, get_neos
+from .neows import CircuitBreaker, NeoWsClient, NeoWsUnavailable
+from .singleflight import Group
 
 # Create your tests here.
+
+# Tests clear the cache, keep them off the shared level the dev server uses (.cache)
+TEST_CACHES = {
+    'default': {'BACKEND': 'sentinel.caching.TieredCache', 'OPTIONS': {'L1': 'local', 'L2': 'shared'}},
+    'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-l1'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-l2'},
+}
+
+
+def neows_response(status_code, body=b'{}', headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    response.headers.update(headers or {})
+    return response
+
+
+@mock.patch('sentinel.neows.time.sleep')
+class NeoWsClientTests(SimpleTestCase):
+
+    def client_with(self, responses, **kwargs):
+        client = NeoWsClient(api_key='test', backoff_base=0, **kwargs)
+        client.session.get = mock.Mock(side_effect=responses)
+        return client
+
+    def test_transient_errors_are_retried(self, sleep):
+        client = self.client_with([
+            neows_response(503),
+            requests.exceptions.ConnectionError('reset'),
+            neows_response(200, b'{"element_count": 3}'),
+        ], max_retries=2)
+
+        self.assertEqual(client.get('feed'), {'element_count': 3})
+        self.assertEqual(client.get_stats()['retries'], 2)
+        self.assertEqual(client.breaker.state, 'closed')
+
+    def test_retry_after_is_honored(self, sleep):
+        client = self.client_with([
+            neows_response(429, headers={'Retry-After': '2'}),
+            neows_response(200),
+        ], max_retries=1)
+
+        client.get('feed')
+        sleep.assert_called_once_with(2.0)
+
+    def test_breaker_opens_after_repeated_failures(self, sleep):
+        client = self.client_with(requests.exceptions.Timeout('slow'), max_retries=1,
+                                  breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30))
+
+        for _ in range(2):
+            with self.assertRaises(NeoWsUnavailable):
+                client.get('feed')
+        self.assertEqual(client.breaker.state, 'open')
+        self.assertEqual(client.session.get.call_count, 4)
+
+        # Open: fails fast without calling NASA
+        with self.assertRaisesMessage(NeoWsUnavailable, 'circuit breaker is open'):
+            client.get('feed')
+        self.assertEqual(client.session.get.call_count, 4)
+        self.assertEqual(client.get_stats()['short_circuits'], 1)
+        self.assertEqual(client.get_stats()['breaker_trips'], 1)
+
+    def test_half_open_trial_closes_the_breaker(self, sleep):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        client = self.client_with([requests.exceptions.Timeout('slow'), neows_response(200)],
+                                  max_retries=0, breaker=breaker)
+        with self.assertRaises(NeoWsUnavailable):
+            client.get('feed')
+
+        breaker.opened_at -= 30
+        self.assertEqual(breaker.state, 'half_open')
+        client.get('feed')
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_client_errors_are_not_retried_or_counted_against_nasa(self, sleep):
+        client = self.client_with([neows_response(404)], max_retries=3)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            client.get('neo/1')
+        self.assertEqual(client.session.get.call_count, 1)
+        self.assertEqual(client.breaker.failures, 0)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class FeedCatalogTests(TestCase):
+    # Past days are never refetched once stored
+    day = date(2020, 1, 2)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_ranges_are_split_into_feed_windows(self):
+        self.assertEqual(_feed_windows(date(2029, 4, 1), date(2029, 4, 15)), [
+            (date(2029, 4, 1), date(2029, 4, 7)),
+            (date(2029, 4, 8), date(2029, 4, 14)),
+            (date(2029, 4, 15), date(2029, 4, 15)),
+        ])
+
+    def test_stale_days(self):
+        future = date.today() + timedelta(days=30)
+        store_feed(self.day, self.day, [])
+        store_feed(future, future, [])
+
+        self.assertEqual(stale_days(self.day - timedelta(days=1), self.day), [self.day - timedelta(days=1)])
+        self.assertEqual(stale_days(future, future), [])
+
+        # Today and future days expire after NEO_FEED_TTL, past days never do
+        FeedDay.objects.update(fetched_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(stale_days(self.day, self.day), [])
+        self.assertEqual(stale_days(future, future), [future])
+
+    @mock.patch('sentinel.nasa.neows.feed', return_value={'near_earth_objects': {}})
+    def test_only_missing_days_are_fetched(self, feed):
+        store_feed(self.day, self.day, [
+            ('1', {'name': '(1 Stored)', 'diameter': 10, 'speed': 5.0, 'miss_distance': 20.0,
+                   'date': self.day.isoformat()}),
+        ])
+
+        neos = get_neos(self.day - timedelta(days=1), self.day + timedelta(days=1))
+
+        self.assertEqual([neo['name'] for neo in neos], ['(1 Stored)'])
+        self.assertCountEqual(feed.call_args_list, [
+            mock.call(self.day - timedelta(days=1), self.day - timedelta(days=1)),
+            mock.call(self.day + timedelta(days=1), self.day + timedelta(days=1)),
+        ])
+
+        get_neos(self.day - timedelta(days=1), self.day + timedelta(days=1))
+        self.assertEqual(feed.call_count, 2)
+
+
+class SingleflightTests(SimpleTestCase):
+
+    def run_concurrently(self, group, fn, callers=4):
+        results = []
+
+        def call():
+            try:
+                results.append(group.do('2029-04-13', fn))
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def test_concurrent_calls_share_one_flight(self):
+        group = Group()
+        release = threading.Event()
+        fn = mock.Mock(side_effect=lambda: release.wait(5) and ['Apophis'])
+
+        threads, results = self.run_concurrently(group, fn)
+        while group.shared < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        fn.assert_called_once()
+        self.assertEqual(results, [['Apophis']] * 4)
+
+    def test_waiters_get_the_leaders_error(self):
+        group = Group()
+        release = threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise NeoWsUnavailable('down')
+
+        threads, results = self.run_concurrently(group, fail, callers=2)
+        while group.shared < 1:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([type(result) for result in results], [NeoWsUnavailable] * 2)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AchievementEvaluationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('create_achievements', stdout=StringIO())
+        cls.explorer_id = Explorer.objects.create(email='explorer@example.com', name='Ada').id
+
+    def setUp(self):
+        cache.clear()
+
+    def unlocked_keys(self):
+        return set(
+            UserAchievement.objects.filter(explorer_id=self.explorer_id).values_list('achievement__key', flat=True)
+        )
+
+    def test_unlocks_every_reached_threshold_at_once(self):
+        UserStats.objects.create(explorer_id=self.explorer_id, chat_questions=10, favorites_count=1)
+
+        newly_unlocked = check_achievements(self.explorer_id)
+
+        self.assertEqual(
+            {achievement.key for achievement in newly_unlocked},
+            {'first_contact', 'cosmic_chatterbox', 'wish_upon_star'},
+        )
+        self.assertEqual(self.unlocked_keys(), {'first_contact', 'cosmic_chatterbox', 'wish_upon_star'})
+        self.assertEqual(check_achievements(self.explorer_id), [])
+
+    def test_unique_neo_chats_count_distinct_neos(self):
+        for neo_name in ['Apophis', 'Bennu', 'Apophis', 'Ryugu']:
+            track_user_interaction(self.explorer_id, 'chat_question', neo_name)
+
+        stats = UserStats.objects.get(explorer_id=self.explorer_id)
+        self.assertEqual(stats.chat_questions, 4)
+        self.assertEqual(stats.unique_neo_chats, 3)
+        self.assertIn('galactic_investigator', self.unlocked_keys())
+
+    def test_query_count_per_interaction(self):
+        track_user_interaction(self.explorer_id, 'chat_question', 'Apophis')
+
+        # interaction insert; in a savepoint the stats get_or_create, the distinct-set lookup
+        # and the counter update; then the stats read and one threshold query
+        with self.assertNumQueries(8):
+            track_user_interaction(self.explorer_id, 'chat_question', 'Apophis')
+
+        # A new NEO also inserts into the distinct set, in its own savepoint
+        with self.assertNumQueries(11):
+            track_user_interaction(self.explorer_id, 'chat_question', 'Bennu')
+
+    def test_listing_views_skip_achievement_checks(self):
+        with self.assertNumQueries(1):
+            track_user_interaction(self.explorer_id, 'neos_view')
+
+    def test_profile_stats_cached_until_next_interaction(self):
+        track_user_interaction(self.explorer_id, 'chat_question', 'Apophis')
+
+        stats = get_user_stats(self.explorer_id)
+        self.assertEqual(stats['total_questions'], 1)
+        self.assertEqual(stats['achievements_count'], 1)
+        self.assertEqual(stats['total_achievements'], 13)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_stats(self.explorer_id), stats)
+
+        track_user_interaction(self.explorer_id, 'chat_question', 'Bennu')
+        self.assertEqual(get_user_stats(self.explorer_id)['unique_neos_chatted'], 2)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class InteractionBufferTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('create_achievements', stdout=StringIO())
+        cls.explorer_id = Explorer.objects.create(email='explorer@example.com', name='Ada').id
+
+    def test_flush_writes_batch_and_unlocks_achievements(self):
+        buffer = InteractionBuffer(max_size=100)
+        # Queue directly so the test doesn't start the background thread
+        buffer._pending = [
+            (self.explorer_id, 'chat_question', 'Apophis'),
+            (self.explorer_id, 'chat_question', 'Bennu'),
+            (self.explorer_id, 'neos_view', None),
+        ]
+
+        self.assertEqual(buffer.flush(), 3)
+
+        self.assertEqual(UserInteraction.objects.filter(explorer_id=self.explorer_id).count(), 3)
+        stats = UserStats.objects.get(explorer_id=self.explorer_id)
+        self.assertEqual((stats.chat_questions, stats.unique_neo_chats), (2, 2))
+        self.assertTrue(UserAchievement.objects.filter(
+            explorer_id=self.explorer_id, achievement__key='first_contact'
+        ).exists())
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_failed_batch_is_rolled_back_and_dropped_after_retries(self):
+        buffer = InteractionBuffer(max_size=100, max_retries=1)
+        buffer._pending = [(self.explorer_id, 'chat_question', 'Apophis')]
+
+        with mock.patch('sentinel.achievements.check_achievements', side_effect=RuntimeError('boom')):
+            with redirect_stdout(StringIO()):
+                self.assertEqual(buffer.flush(), 0)
+                self.assertEqual(buffer.flush(), 0)
+
+        self.assertFalse(UserInteraction.objects.filter(explorer_id=self.explorer_id).exists())
+        self.assertFalse(UserStats.objects.filter(explorer_id=self.explorer_id, chat_questions__gt=0).exists())
+        self.assertEqual(buffer.dropped, 1)
+        self.assertEqual(buffer.flush(), 0)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class GenerationLeaseTests(TestCase):
+
+    def test_overrunning_holder_keeps_the_taken_over_lease(self):
+        first = acquire_lease('insights')
+        self.assertIsNone(acquire_lease('insights'))
+
+        # The first holder overran its lease and another worker took it over
+        GenerationLease.objects.filter(key='insights').update(expires_at=first - timedelta(days=1))
+        second = acquire_lease('insights')
+        self.assertIsNotNone(second)
+
+        release_lease('insights', first)
+        self.assertTrue(GenerationLease.objects.filter(key='insights').exists())
+        release_lease('insights', second)
+        self.assertFalse(GenerationLease.objects.filter(key='insights').exists())
+
+    @mock.patch('sentinel.ai_cache.time.sleep')
+    def test_waits_for_the_holder_instead_of_generating(self, sleep):
+        GenerationLease.objects.create(key='insights', expires_at=timezone.now() + timedelta(minutes=1))
+
+        def holder_finishes(seconds):
+            ai_cache.put('insights', 'insights', 'test', {'summary': 'From the other worker'})
+            GenerationLease.objects.filter(key='insights').delete()
+        sleep.side_effect = holder_finishes
+        produce = mock.Mock()
+
+        payload = ai_cache._generate_once('insights', 'insights', 'test', produce)
+
+        self.assertEqual(payload, {'summary': 'From the other worker'})
+        produce.assert_not_called()
+
+
+@override_settings(CACHES=TEST_CACHES)
+class GeneratedContentCacheTests(TestCase):
+    neo = {'name': ' (2024 YR4) ', 'diameter': '60.2', 'speed': 17.301, 'miss_distance': '4.14', 'date': '2032-12-22'}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_equal_neos_share_one_generation(self):
+        produce = mock.Mock(return_value={'summary': 'Quack'})
+        generate = ai_cache.cached_generation('summary', prompt_version=1, model_name='test')(produce)
+
+        self.assertEqual(generate(self.neo), {'summary': 'Quack'})
+        # Formatted differently, the same NEO once normalized
+        self.assertEqual(generate({**self.neo, 'name': '(2024 YR4)', 'diameter': 60, 'speed': '17.30'}),
+                         {'summary': 'Quack'})
+
+        produce.assert_called_once()
+        self.assertEqual(GeneratedContent.objects.count(), 1)
+
+    def test_expired_entries_are_not_served(self):
+        ai_cache.put('expired', 'summary', 'test', {'summary': 'Old'})
+        GeneratedContent.objects.update(created_at=timezone.now() - timedelta(seconds=ai_cache.GEMINI_CACHE_TTL + 1))
+        cache.clear()
+
+        self.assertIsNone(ai_cache.get('expired'))
+        self.assertFalse(GeneratedContent.objects.exists())
+
+    @mock.patch('sentinel.ai_cache.GEMINI_CACHE_MAX_ENTRIES', 2)
+    def test_least_recently_used_entries_are_evicted(self):
+        for i, key in enumerate(['used', 'unused']):
+            ai_cache.put(key, 'summary', 'test', {'summary': key})
+            GeneratedContent.objects.filter(key=key).update(last_used_at=timezone.now() - timedelta(hours=2 - i))
+        # Reading 'used' from the table moves it to the front
+        cache.clear()
+        ai_cache.get('used')
+
+        ai_cache.put('new', 'summary', 'test', {'summary': 'new'})
+
+        self.assertCountEqual(GeneratedContent.objects.values_list('key', flat=True), ['used', 'new'])
+
+
+@override_settings(CACHES=TEST_CACHES)
+@mock.patch('sentinel.management.commands.pregenerate_briefings.get_neos', return_value=[])
+@mock.patch('sentinel.management.commands.pregenerate_briefings.generate_briefing_core')
+class PregenerateBriefingsTests(TestCase):
+
+    def pregenerate(self):
+        call_command('pregenerate_briefings', '--date', '2029-04-13', stdout=StringIO())
+
+    def test_no_gemini_call_without_pending_users(self, generate_briefing_core, get_neos):
+        self.pregenerate()
+        generate_briefing_core.assert_not_called()
+
+    def test_gemini_failure_is_reported(self, generate_briefing_core, get_neos):
+        track_user_interaction(Explorer.objects.create(email='explorer@example.com').id, 'neos_view')
+        generate_briefing_core.side_effect = RuntimeError('quota exceeded')
+
+        with self.assertRaisesMessage(CommandError, 'quota exceeded'):
+            self.pregenerate()
+        self.assertFalse(DailyBriefing.objects.exists())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ExplorerResolutionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_explorer_resolved_once_per_session(self):
+        request = RequestFactory().get('/')
+        SessionMiddleware(lambda request: None).process_request(request)
+        request.session['user'] = {'email': 'explorer@example.com', 'name': 'Ada'}
+
+        explorer_id = get_explorer_id(request)
+
+        self.assertEqual(Explorer.objects.get(email='explorer@example.com').id, explorer_id)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_explorer_id(request), explorer_id)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StatsTests(TestCase):
+
+    def test_stream_timings_report_the_chat_model(self):
+        with mock.patch.dict(gemini.timings, clear=True):
+            gemini._record('chat:stream', 0)
+            timings = gemini.get_timings()
+        self.assertEqual(timings['chat:stream']['model'], gemini.MODEL_TIERS['chat']['model'])
+
+    def test_stats_are_staff_only(self):
+        self.assertEqual(self.client.get('/api/stats/').status_code, 302)
+
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+        stats = self.client.get('/api/stats/').json()
+        self.assertEqual(set(stats), {'gemini', 'ai_cache', 'neows', 'cache', 'interaction_buffer'})
+
+
+class DatabaseThreadTests(SimpleTestCase):
+
+    def test_pool_threads_close_expired_connections(self):
+        with mock.patch('sentinel.db.close_old_connections') as close_old_connections:
+            result = async_to_sync(database_sync_to_async(lambda: 'done'))()
+
+        self.assertEqual(result, 'done')
+        self.assertEqual(close_old_connections.call_count, 2)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TieredCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_shared_hits_are_copied_into_process_cache(self):
+        tiered = caches['default']
+        before = tiered.get_stats()
+        tiered.set('answer', 42)
+        # As if another worker had written it
+        caches['local'].clear()
+
+        self.assertEqual(tiered.get('answer'), 42)
+        self.assertEqual(caches['local'].get('answer'), 42)
+        self.assertEqual(tiered.get('answer'), 42)
+        self.assertIsNone(tiered.get('question'))
+
+        stats = tiered.get_stats()
+        self.assertEqual(
+            [stats[stat] - before[stat] for stat in ('l1_hits', 'l2_hits', 'misses')],
+            [1, 1, 1],
+        )
+
+    def test_namespace_invalidate_drops_every_key(self):
+        neo_reads = Namespace('neo_reads')
+        neo_reads.set('2029-04-13', ['Apophis'])
+        self.assertEqual(neo_reads.get('2029-04-13'), ['Apophis'])
+
+        neo_reads.invalidate()
+
+        self.assertIsNone(neo_reads.get('2029-04-13'))
+        self.assertEqual(neo_reads.get_or_set('2029-04-13', lambda: ['Apophis', 'Bennu']), ['Apophis', 'Bennu'])
+        self.assertEqual(neo_reads.get('2029-04-13'), ['Apophis', 'Bennu'])
+
+    def test_value_produced_across_an_invalidate_is_not_served(self):
+        neo_reads = Namespace('neo_reads')
+
+        def produce():
+            # New feed data is stored while the old catalog is being read
+            neo_reads.invalidate()
+            return ['Apophis']
+
+        self.assertEqual(neo_reads.get_or_set('2029-04-13', produce), ['Apophis'])
+        self.assertIsNone(neo_reads.get('2029-04-13'))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class NeoPaginationTests(TestCase):
+    day = date(2029, 4, 13)
+
+    @classmethod
+    def setUpTestData(cls):
+        store_feed(cls.day, cls.day, [
+            (str(i), {'name': f'({i} Synthetic)', 'diameter': 100 * (i % 5), 'speed': 10 + i,
+                      'miss_distance': float(i), 'date': cls.day.isoformat()})
+            for i in range(1, 12)
+        ])
+
+    def test_cursor_walks_sorted_pages_without_gaps(self):
+        pages, cursor = [], None
+        while True:
+            neos, total, cursor = page_neos(self.day, self.day, sort='-diameter', cursor=cursor, page_size=4)
+            pages.append(neos)
+            if cursor is None:
+                break
+
+        seen = [neo for page in pages for neo in page]
+        self.assertEqual([len(page) for page in pages], [4, 4, 3])
+        self.assertEqual(total, 11)
+        self.assertEqual(len({neo['name'] for neo in seen}), 11)
+        diameters = [neo['diameter'] for neo in seen]
+        self.assertEqual(diameters, sorted(diameters, reverse=True))
+
+    def test_filters_bound_results_and_total(self):
+        neos, total, cursor = page_neos(
+            self.day, self.day, sort='miss_distance', filters={'max_miss_distance': 5, 'min_diameter': 200}
+        )
+
+        self.assertEqual([neo['miss_distance'] for neo in neos], [2.0, 3.0, 4.0])
+        self.assertEqual(total, 3)
+        self.assertIsNone(cursor)
+
+    def test_cursor_rejected_for_other_sort(self):
+        _, _, cursor = page_neos(self.day, self.day, sort='speed', page_size=2)
+
+        with self.assertRaises(ValueError):
+            page_neos(self.day, self.day, sort='-speed', cursor=cursor)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ConditionalNeoDataTests(TransactionTestCase):
+    # The view reads the catalog from a worker thread, which can't see a TestCase transaction
+    day = date(2029, 4, 13)
+
+    def setUp(self):
+        cache.clear()
+        store_feed(self.day, self.day, [
+            (str(i), {'name': f'({i} Synthetic)', 'diameter': 100.0, 'speed': 10.0,
+                      'miss_distance': float(i), 'date': self.day.isoformat()})
+            for i in range(1, 4)
+        ])
+        session = self.client.session
+        session['user'] = {'email': 'explorer@example.com', 'name': 'Ada'}
+        session.save()
+        self.url = f'/api/neos-data/?start_date={self.day}&end_date={self.day}'
+
+    def test_repeat_poll_is_not_modified(self):
+        first = self.client.get(self.url)
+        again = self.client.get(self.url, headers={'If-None-Match': first['ETag']})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('no-cache', first['Cache-Control'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], first['ETag'])
+
+    def test_favoriting_changes_etag(self):
+        first = self.client.get(self.url)
+        self.client.post('/save_favorite/', {
+            'name': '(1 Synthetic)', 'diameter': 100, 'speed': 10, 'miss_distance': 1, 'date': self.day,
+        })
+        again = self.client.get(self.url, headers={'If-None-Match': first['ETag']})
+
+        self.assertEqual(again.status_code, 200)
+        self.assertNotEqual(again['ETag'], first['ETag'])
+        self.assertTrue(again.json()['neos'][0]['is_favorite'])
+
+    def test_columnar_format_matches_objects(self):
+        self.client.post('/save_favorite/', {
+            'name': '(2 Synthetic)', 'diameter': 100, 'speed': 10, 'miss_distance': 2, 'date': self.day,
+        })
+        neos = self.client.get(self.url).json()['neos']
+        columnar = self.client.get(self.url + '&format=columnar').json()
+
+        self.assertEqual(columnar['count'], len(neos))
+        self.assertEqual(columnar['columns']['name'], [neo['name'] for neo in neos])
+        bitmap = base64.b64decode(columnar['favorites'])
+        self.assertEqual(
+            [bool(bitmap[i >> 3] >> (i & 7) & 1) for i in range(len(neos))],
+            [neo['is_favorite'] for neo in neos],
+        )
+
+    def get(self, endpoint, start_date, end_date):
+        return self.client.get(f'/api/{endpoint}/?start_date={start_date}&end_date={end_date}')
+
+    def test_reversed_ranges_are_rejected(self):
+        for endpoint in ('neos-data', 'neo-stats'):
+            response = self.get(endpoint, self.day, self.day - timedelta(days=1))
+            self.assertEqual(response.status_code, 400, endpoint)
+            self.assertIn('before start_date', response.json()['error'])
+
+    def test_overlong_ranges_are_rejected(self):
+        listing = self.get('neos-data', self.day, self.day + timedelta(days=NEO_MAX_RANGE_DAYS))
+        stats = self.get('neo-stats', self.day, self.day + timedelta(days=NEO_STATS_MAX_RANGE_DAYS))
+
+        self.assertEqual(listing.status_code, 400)
+        self.assertEqual(stats.status_code, 400)
+        self.assertIn(f'{NEO_MAX_RANGE_DAYS} days', listing.json()['error'])
+
+    @mock.patch('sentinel.nasa._fetch_days')
+    def test_multi_year_stats_read_the_catalog_only(self, fetch_days):
+        response = self.get('neo-stats', self.day - timedelta(days=3 * 365), self.day)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 3)
+        fetch_days.assert_not_called()
+
+
+class CompressionTests(SimpleTestCase):
+
+    def compress(self, response):
+        request = RequestFactory().get('/', headers={'Accept-Encoding': 'br, gzip'})
+        brotli = mock.Mock(compress=lambda content, quality: b'br')
+        with mock.patch('sentinel.middleware.brotli', brotli):
+            return CompressionMiddleware(lambda request: response)(request)
+
+    def test_api_responses_use_brotli(self):
+        response = self.compress(JsonResponse({'neos': ['Apophis'] * 100}))
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+    def test_pages_use_padded_gzip(self):
+        response = self.compress(HttpResponse('<p>Apophis</p>' * 100))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+
+class NeoStatsTests(SimpleTestCase):
+    columns = {
+        'id': ['1', '2', '3', '4'],
+        'name': ['(1 Small)', '(2 Big)', '(3 Close)', '(4 Fast)'],
+        'diameter': [20.0, 900.0, 50.0, 30.0],
+        'speed': [10.0, 12.0, 8.0, 40.0],
+        'miss_distance': [30.0, 15.0, 0.5, 60.0],
+        'date': [date(2029, 4, 13)] * 4,
+    }
+
+    def test_extremes_and_hazard(self):
+        stats = neo_stats(self.columns, bins=4)
+
+        self.assertEqual(stats['count'], 4)
+        self.assertEqual(stats['extremes']['largest']['name'], '(2 Big)')
+        self.assertEqual(stats['extremes']['fastest']['name'], '(4 Fast)')
+        self.assertEqual(stats['extremes']['closest']['name'], '(3 Close)')
+        self.assertEqual(stats['extremes']['most_hazardous']['name'], '(2 Big)')
+        self.assertEqual(stats['hazard']['potentially_hazardous'], 1)
+        self.assertEqual(sum(stats['fields']['speed']['histogram']['counts']), 4)
+        self.assertEqual(stats['fields']['speed']['percentiles']['50'], 11.0)
+
+    def test_empty_range(self):
+        self.assertEqual(neo_stats({field: [] for field in self.columns})['count'], 0)
+
+    def test_interesting_indices_are_distinct(self):
+        picks = interesting_indices(self.columns['diameter'], self.columns['speed'], self.columns['miss_distance'])
+
+        self.assertEqual(picks, [1, 2, 3])
+
+
+class InsightsParsingTests(SimpleTestCase):
+
+    def test_sections_and_wrapped_summary(self):
+        insights = gemini.parse_insights(
+            "**SUMMARY:** Apophis is a big space rock\n"
+            "that visits in 2029!\n"
+            "SIZE: As long as three football fields\n"
+            "**Speed**: Faster than a rocket\n"
+            "DISTANCE: Closer than the Moon\n"
+            "DATE: Friday the 13th!\n"
+        )
+
+        self.assertEqual(insights['summary'], 'Apophis is a big space rock that visits in 2029!')
+        self.assertEqual(insights['descriptions'], {
+            'size': 'As long as three football fields',
+            'speed': 'Faster than a rocket',
+            'distance': 'Closer than the Moon',
+            'date': 'Friday the 13th!',
+        })
+
+    def test_unexpected_reply_is_empty(self):
+        self.assertEqual(gemini.parse_insights('Quack! I cannot help with that.'), {})
+
+
+class ChatStreamTests(TestCase):
+    neo = {'name': '(2024 YR4)', 'diameter': 60, 'speed': 17.3, 'miss_distance': 4.1,
+           'date': '2032-12-22', 'question': 'How big is it?'}
+
+    async def stream(self):
+        response = await self.async_client.post('/chat-quackstronaut/stream/', self.neo)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+    async def test_streams_each_chunk_as_an_event(self):
+        async def answer(neo, question):
+            for text in ['Quack! ', 'About 60 meters.']:
+                yield text
+
+        with mock.patch('sentinel.views.astream_with_quackstronaut', answer):
+            body = await self.stream()
+
+        self.assertEqual(body, (
+            'data: {"delta": "Quack! "}\n\n'
+            'data: {"delta": "About 60 meters."}\n\n'
+            'event: done\ndata: {}\n\n'
+        ))
+
+    async def test_gemini_errors_end_the_stream_with_an_error_event(self):
+        async def answer(neo, question):
+            yield 'Quack'
+            raise RuntimeError('quota exceeded')
+
+        with mock.patch('sentinel.views.astream_with_quackstronaut', answer):
+            body = await self.stream()
+
+        self.assertTrue(body.endswith('event: error\ndata: {"error": "quota exceeded"}\n\n'))
+
+
+NEOWS_LOOKUP = {
+    'id': '2099942',
+    'name': '99942 Apophis (2004 MN4)',
+    'absolute_magnitude_h': 19.09,
+    'is_potentially_hazardous_asteroid': True,
+    'nasa_jpl_url': 'https://ssd.jpl.nasa.gov/tools/sbdb_lookup.html#/?sstr=2099942',
+    'estimated_diameter': {'meters': {'estimated_diameter_min': 310.0, 'estimated_diameter_max': 690.0}},
+    'close_approach_data': [
+        {'close_approach_date': date, 'orbiting_body': 'Earth',
+         'relative_velocity': {'kilometers_per_second': speed}, 'miss_distance': {'lunar': lunar}}
+        for date, speed, lunar in [('2029-04-13', '7.42', '0.1'), ('2036-03-27', '5.1', '80.2')]
+    ],
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class NeoDetailTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    @mock.patch('sentinel.nasa.neows.lookup', return_value=NEOWS_LOOKUP)
+    def test_detail_page_is_cached_and_revalidated(self, lookup):
+        first = self.client.get('/neos/2099942/?date=2029-04-13')
+        again = self.client.get('/neos/2099942/?date=2029-04-13', headers={'If-None-Match': first['ETag']})
+
+        self.assertContains(first, '99942 Apophis')
+        self.assertContains(first, '0.1 LD')
+        self.assertIn('public', first['Cache-Control'])
+        self.assertEqual(again.status_code, 304)
+        lookup.assert_called_once_with('2099942')
+
+    @mock.patch('sentinel.nasa.neows.lookup', return_value=NEOWS_LOOKUP)
+    def test_anonymous_page_sets_no_cookies(self, lookup):
+        response = self.client.get('/neos/2099942/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies, {})
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+
+    def test_posted_neo_without_id_renders(self):
+        response = self.client.post('/neo-details/', {
+            'name': '(2024 YR4)', 'diameter': 60, 'speed': 17.3, 'miss_distance': 4.1, 'date': '2032-12-22',
+        })
+
+        self.assertContains(response, '(2024 YR4)')
+
+    def test_posted_neo_with_id_redirects(self):
+        response = self.client.post('/neo-details/', {'neo_id': '2099942', 'date': '2029-04-13'})
+
+        self.assertRedirects(response, '/neos/2099942/?date=2029-04-13', fetch_redirect_response=False)
+
+    @mock.patch('sentinel.nasa.neows.lookup')
+    def test_unknown_neo_is_404(self, lookup):
+        not_found = requests.Response()
+        not_found.status_code = 404
+        lookup.side_effect = requests.exceptions.HTTPError(response=not_found)
+
+        self.assertEqual(self.client.get('/neos/1/').status_code, 404)
+        self.assertEqual(self.client.get('/neos/1/').status_code, 404)
+        lookup.assert_called_once()
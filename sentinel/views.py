@@ -1,13 +1,37 @@
 import os
+import json
+import base64
+import hashlib
+from urllib.parse import urlencode
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from authlib.integrations.django_client import OAuth
 from django.contrib.auth import logout as django_logout
-from django.http import HttpResponseRedirect, JsonResponse
-from .nasa import fetch_neos
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from .nasa import aget_neos, aget_neo, aget_neo_page, aget_neo_stats, afeed_version, astats_version, NEO_LOOKUP_TTL
+from .analytics import HISTOGRAM_BINS
+from .catalog import NEO_FILTERS, NEO_PAGE_SIZE, NEO_MAX_PAGE_SIZE, neo_columns, flag_bitmap
 from django.views.decorators.csrf import csrf_exempt
-from .gemini import summarize_asteroid, generate_fun_descriptions, chat_with_quackstronaut, generate_daily_briefing
-from .models import FavoriteNEO
-from .achievements import track_user_interaction, get_user_stats, get_user_achievements
+from django.contrib.admin.views.decorators import staff_member_required
+from django.utils import timezone
+from . import ai_cache, caching, gemini, interaction_buffer, neows
+from .gemini import agenerate_neo_insights, achat_with_quackstronaut, astream_with_quackstronaut, agenerate_daily_briefing
+from .models import FavoriteNEO, DailyBriefing
+from .achievements import track_user_interaction, record_unfavorite, get_user_stats, get_user_achievements
+from .explorers import save_explorer, get_explorer_id, aget_explorer_id, favorites_namespace
+
+try:
+    import msgpack
+except ImportError:  # optional, format=msgpack is refused without it
+    msgpack = None
+
+# Seconds browsers and shared caches may keep a NEO detail page or its insights
+NEO_DETAIL_MAX_AGE = getattr(settings, 'NEO_DETAIL_MAX_AGE', 60 * 60)
+
+# Listing formats of /api/neos-data/: a list of NEO objects, or one array per field
+NEO_FORMATS = ['json', 'columnar', 'msgpack']
 
 
 # AUTH0 related stuff --------
@@ -22,6 +46,21 @@ oauth.register(
     server_metadata_url=f'https://{os.getenv("AUTH0_DOMAIN")}/.well-known/openid-configuration',
 )
 
+def make_etag(*parts, weak=False):
+    """A quoted ETag from the versions a response is built from, so it can be checked before building it"""
+    digest = hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def not_modified(request, etag, **cache_control):
+    """A 304 response if the client already has etag, else None"""
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response.headers['ETag'] = etag
+        patch_cache_control(response, **cache_control)
+    return response
+
+
 def login(request):
     return oauth.auth0.authorize_redirect(request, os.getenv("AUTH0_CALLBACK_URL"))
 
@@ -32,6 +71,7 @@ def callback(request):
     print("User info:", user_info)
 
     request.session['user'] = user_info
+    request.session['explorer_id'] = save_explorer(user_info)
     return redirect('/')
 
 def logout(request):
@@ -55,53 +95,88 @@ def home(request):
     })
 
 # Async endpoint for daily briefing
-def get_daily_briefing(request):
-    user = request.session.get('user')
+async def get_daily_briefing(request):
+    user = await request.session.aget('user')
     if not user:
         return JsonResponse({'error': 'Not authenticated'}, status=401)
+    explorer_id = await aget_explorer_id(request)
     
     try:
-        from datetime import date
+        from datetime import date, datetime, timedelta
         from django.core.cache import cache
         
         # Create a cache key based on user and date
-        today_str = date.today().strftime('%Y-%m-%d')
-        cache_key = f"daily_briefing_{user['email']}_{today_str}"
+        today = date.today()
+        today_str = today.strftime('%Y-%m-%d')
+        cache_key = f"daily_briefing_{explorer_id}_{today_str}"
+        
+        # A user gets one briefing a day, so the browser may keep it until midnight
+        etag = make_etag('daily_briefing', explorer_id, today_str, weak=True)
+        until_midnight = datetime.combine(today + timedelta(days=1), datetime.min.time()) - datetime.now()
+        cache_control = {'private': True, 'max_age': min(3600, int(until_midnight.total_seconds()))}
+        response = not_modified(request, etag, **cache_control)
+        if response is not None:
+            return response
+
+        def briefing_response(briefing, cached):
+            response = JsonResponse({
+                'briefing': briefing,
+                'cached': cached
+            })
+            response.headers['ETag'] = etag
+            patch_cache_control(response, **cache_control)
+            return response
         
         # Try to get cached briefing first
-        cached_briefing = cache.get(cache_key)
+        cached_briefing = await cache.aget(cache_key)
         if cached_briefing:
-            return JsonResponse({
-                'briefing': cached_briefing,
-                'cached': True
-            })
+            return briefing_response(cached_briefing, True)
+        
+        # Briefings pre-generated by the pregenerate_briefings command
+        stored = await DailyBriefing.objects.filter(explorer_id=explorer_id, date=today).afirst()
+        if stored:
+            if stored.delivered_at is None:
+                await sync_to_async(track_user_interaction)(explorer_id, 'daily_briefing')
+                stored.delivered_at = timezone.now()
+                await stored.asave(update_fields=['delivered_at'])
+            await cache.aset(cache_key, stored.briefing, 86400)
+            return briefing_response(stored.briefing, True)
         
         # Track daily briefing interaction
-        track_user_interaction(user['email'], 'daily_briefing')
+        await sync_to_async(track_user_interaction)(explorer_id, 'daily_briefing')
         
-        # Get today's NEOs for the briefing
-        current_neos = fetch_neos(today_str, today_str)
+        # Get today's NEOs for the briefing from the same per-day catalog as the listing
+        current_neos = await aget_neos(today_str, today_str)
         
         # Generate personalized daily briefing
-        daily_briefing = generate_daily_briefing(user.get('name', 'Explorer'), current_neos)
+        daily_briefing = await agenerate_daily_briefing(user.get('name', 'Explorer'), current_neos)
         
         # Cache the briefing for 24 hours (86400 seconds)
-        cache.set(cache_key, daily_briefing, 86400)
+        await cache.aset(cache_key, daily_briefing, 86400)
+        await DailyBriefing.objects.aupdate_or_create(
+            explorer_id=explorer_id,
+            date=today,
+            defaults={
+                'user_name': user.get('name', 'Explorer'),
+                'briefing': daily_briefing,
+                'delivered_at': timezone.now(),
+            },
+        )
         
-        return JsonResponse({
-            'briefing': daily_briefing,
-            'cached': False
-        })
+        return briefing_response(daily_briefing, False)
         
     except Exception as e:
         # Fallback briefing if API fails
         fallback_briefing = f"🦆 Quack quack, {user.get('name', 'Explorer')}! Welcome back to the CosmoDex space lab! Even when the cosmic data streams are a bit wobbly, there's always something amazing happening in our solar system. Today's a perfect day to explore our asteroid database and maybe discover your new favorite space rock! Ready to dive into some cosmic adventures? 🚀✨"
         
-        return JsonResponse({
+        response = JsonResponse({
             'briefing': fallback_briefing,
             'cached': False,
             'fallback': True
         })
+        # Not today's briefing, so ask again next time
+        patch_cache_control(response, no_store=True)
+        return response
 
 # neos listing page
 def index(request):
@@ -116,7 +191,7 @@ def index(request):
     # Get user's favorited NEOs for immediate display
     user_favorites = set()
     if user:
-        favorites = FavoriteNEO.objects.filter(user_email=user["email"]).values_list('name', flat=True)
+        favorites = FavoriteNEO.objects.filter(explorer_id=get_explorer_id(request)).values_list('name', flat=True)
         user_favorites = set(favorites)
     
     # Pass current date range to template for form defaults
@@ -132,57 +207,150 @@ def index(request):
         'current_end_date': current_end
     })
 
-# Async endpoint for fetching NEOs
-def get_neos_data(request):
-    user = request.session.get('user')
+# Async endpoint for fetching NEOs, one sorted and filtered page at a time
+async def get_neos_data(request):
+    user = await request.session.aget('user')
     if not user:
         return JsonResponse({'error': 'Not authenticated'}, status=401)
-    
+    explorer_id = await aget_explorer_id(request)
+
+    # Get date range, ordering, filters and page position from request parameters
+    start_date = request.GET.get('start_date')
+    end_date = request.GET.get('end_date')
+    sort = request.GET.get('sort', 'date')
+    cursor = request.GET.get('cursor')
+    neo_format = request.GET.get('format', 'json')
+    if neo_format not in NEO_FORMATS:
+        return JsonResponse({'error': f'Unknown format: {neo_format}', 'success': False}, status=400)
+    if neo_format == 'msgpack' and msgpack is None:
+        return JsonResponse({'error': 'msgpack is not installed on the server', 'success': False}, status=406)
     try:
-        # Get date range from request parameters
-        start_date = request.GET.get('start_date')
-        end_date = request.GET.get('end_date')
-        
-        # Track user interaction
-        track_user_interaction(user['email'], 'neos_view')
-        
-        # Fetch NEOs from NASA API
-        neos = fetch_neos(start_date, end_date)
-        
-        # Get user's favorited NEOs
-        user_favorites = set()
-        if user:
-            favorites = FavoriteNEO.objects.filter(user_email=user["email"]).values_list('name', flat=True)
-            user_favorites = set(favorites)
-        
-        # Add favorite status to each NEO
+        page_size = min(int(request.GET.get('page_size', NEO_PAGE_SIZE)), NEO_MAX_PAGE_SIZE)
+        if page_size < 1:
+            raise ValueError('page_size must be positive')
+        filters = {
+            name: float(request.GET[name])
+            for name in NEO_FILTERS
+            if request.GET.get(name)
+        }
+    except ValueError as e:
+        return JsonResponse({'error': f'Invalid parameter: {e}', 'success': False}, status=400)
+
+    try:
+        # Track user interaction once per listing, not for every further page
+        if not cursor:
+            await sync_to_async(track_user_interaction)(explorer_id, 'neos_view')
+
+        # The page only changes with the stored feed (refreshing stale days from NASA first),
+        # the user's favorites and the query, so a client that has this version gets a 304
+        feed_version = await afeed_version(start_date, end_date)
+        favorites_version = await sync_to_async(favorites_namespace(explorer_id).version)()
+        etag = make_etag('neos', feed_version, favorites_version, request.GET.urlencode())
+        response = not_modified(request, etag, private=True, no_cache=True)
+        if response is not None:
+            return response
+
+        # Read the page from the local catalog
+        neos, total, next_cursor = await aget_neo_page(
+            start_date, end_date, sort=sort, filters=filters, cursor=cursor, page_size=page_size,
+            refresh=False,
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e), 'success': False}, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'error': f'Failed to fetch NEO data: {str(e)}',
+            'success': False
+        }, status=500)
+
+    # Favorite status only for the NEOs on this page
+    favorites = FavoriteNEO.objects.filter(
+        explorer_id=explorer_id, name__in=[neo['name'] for neo in neos]
+    ).values_list('name', flat=True)
+    user_favorites = {name async for name in favorites}
+
+    page = {
+        'total': total,
+        'next_cursor': next_cursor,
+        'sort': sort,
+        'page_size': page_size,
+        'success': True
+    }
+
+    if neo_format == 'json':
         for neo in neos:
             neo['is_favorite'] = neo['name'] in user_favorites
-        
-        return JsonResponse({
-            'neos': neos,
-            'success': True
-        })
-        
+        response = JsonResponse({'neos': neos, **page})
+    else:
+        # One array per field, plus bit i of favorites set when NEO i is a favorite
+        favorites_bitmap = flag_bitmap([neo['name'] in user_favorites for neo in neos])
+        columnar = {'format': 'columnar', 'count': len(neos), 'columns': neo_columns(neos), **page}
+        if neo_format == 'msgpack':
+            columnar['favorites'] = favorites_bitmap
+            response = HttpResponse(msgpack.packb(columnar), content_type='application/msgpack')
+        else:
+            columnar['favorites'] = base64.b64encode(favorites_bitmap).decode('ascii')
+            response = JsonResponse(columnar, json_dumps_params={'separators': (',', ':')})
+
+    # Stored by the browser but revalidated on every poll
+    response.headers['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+# Async endpoint for aggregate statistics over a date range
+async def get_neo_stats(request):
+    user = await request.session.aget('user')
+    if not user:
+        return JsonResponse({'error': 'Not authenticated'}, status=401)
+
+    start_date = request.GET.get('start_date')
+    end_date = request.GET.get('end_date')
+    try:
+        bins = int(request.GET.get('bins', HISTOGRAM_BINS))
+        if not 1 <= bins <= 100:
+            raise ValueError('bins must be between 1 and 100')
+    except ValueError as e:
+        return JsonResponse({'error': f'Invalid parameter: {e}', 'success': False}, status=400)
+
+    try:
+        # Same for every user, only the stored feed changes it
+        etag = make_etag('neo_stats', await astats_version(start_date, end_date), request.GET.urlencode())
+        response = not_modified(request, etag, private=True, no_cache=True)
+        if response is not None:
+            return response
+
+        stats = await aget_neo_stats(start_date, end_date, bins=bins, refresh=False)
+    except ValueError as e:
+        return JsonResponse({'error': str(e), 'success': False}, status=400)
     except Exception as e:
         return JsonResponse({
-            'error': f'Failed to fetch NEO data: {str(e)}',
+            'error': f'Failed to compute NEO stats: {str(e)}',
             'success': False
         }, status=500)
 
+    response = JsonResponse({**stats, 'success': True})
+    response.headers['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
 # favorite neos list
 def favorites(request):
     user = request.session.get("user")
     if not user:
         return redirect("/")
 
-    favs = FavoriteNEO.objects.filter(user_email=user["email"])
+    favs = FavoriteNEO.objects.filter(explorer_id=get_explorer_id(request))
     return render(request, "sentinel/favorites.html", {"favorites": favs, "user": user})
 
 # details page about each neo
 @csrf_exempt
 def neo_details(request):
     if request.method == "POST":
+        # Forms that know the NeoWs id go to the linkable, cacheable page
+        neo_id = request.POST.get("neo_id")
+        if neo_id and neo_id.isdigit():
+            return redirect(f"/neos/{neo_id}/?{urlencode({'date': request.POST.get('date', '')})}")
+
         neo = {
             'name': request.POST.get("name"),
             'diameter': request.POST.get("diameter"),
@@ -191,16 +359,17 @@ def neo_details(request):
             'date': request.POST.get("date"),
         }
         user = request.session.get('user')
+        explorer_id = get_explorer_id(request)
         
         # Track NEO viewing for achievements
         if user:
-            track_user_interaction(user['email'], 'neo_viewed', neo['name'])
+            track_user_interaction(explorer_id, 'neo_viewed', neo['name'])
         
         # Check if this NEO is already favorited by the user
         is_favorited = False
         if user:
             is_favorited = FavoriteNEO.objects.filter(
-                user_email=user["email"],
+                explorer_id=explorer_id,
                 name=neo['name']
             ).exists()
         
@@ -208,13 +377,87 @@ def neo_details(request):
         return render(request, 'sentinel/neo_details.html', {
             "neo": neo, 
             "user": user,
-            "is_favorited": is_favorited
+            "is_favorited": is_favorited,
+            "fragment_timeout": NEO_LOOKUP_TTL,
         })
     return redirect('/neos')
 
+# NEO detail page, addressed by NeoWs id so it can be linked to and cached.
+# Async so a slow NeoWs lookup doesn't hold up other requests.
+async def neo_detail(request, neo_id):
+    neo = await aget_neo(neo_id, request.GET.get('date'))
+    if neo is None:
+        raise Http404("Unknown NEO")
+
+    user = await request.session.aget('user')
+    explorer_id = await aget_explorer_id(request)
+
+    # Track NEO viewing for achievements and check if it's already favorited
+    is_favorited = False
+    if user:
+        await sync_to_async(track_user_interaction)(explorer_id, 'neo_viewed', neo['name'])
+        is_favorited = await FavoriteNEO.objects.filter(explorer_id=explorer_id, name=neo['name']).aexists()
+
+    # Signed-in pages show the favorite button, so they are revalidated on every view
+    if user:
+        cache_control = {'private': True, 'no_cache': True}
+    else:
+        cache_control = {'public': True, 'max_age': NEO_DETAIL_MAX_AGE}
+    etag = make_etag('neo_detail', neo['id'], neo['date'], neo.get('fetched_at'), explorer_id, is_favorited)
+    response = not_modified(request, etag, **cache_control)
+    if response is not None:
+        return response
+
+    response = render(request, 'sentinel/neo_details.html', {
+        "neo": neo,
+        "user": user,
+        "is_favorited": is_favorited,
+        "fragment_timeout": NEO_LOOKUP_TTL,
+    })
+    response.headers['ETag'] = etag
+    patch_cache_control(response, **cache_control)
+    return response
+
+# Async endpoint for the NEO summary and fun descriptions in one generation.
+# GET ?id=<NeoWs id>&date=... resolves the NEO on the server, so the answer can be cached.
+@csrf_exempt
+async def get_neo_insights(request):
+    if request.method == "POST":
+        neo = {
+            'name': request.POST.get("name"),
+            'diameter': request.POST.get("diameter"),
+            'speed': request.POST.get("speed"),
+            'miss_distance': request.POST.get("miss_distance"),
+            'date': request.POST.get("date"),
+        }
+    elif request.GET.get('id', '').isdigit():
+        neo = await aget_neo(request.GET['id'], request.GET.get('date'))
+        if neo is None:
+            return JsonResponse({'error': 'Unknown NEO', 'success': False}, status=404)
+    else:
+        return JsonResponse({'success': False}, status=400)
+
+    try:
+        insights = await agenerate_neo_insights(neo)
+    except Exception as e:
+        return JsonResponse({
+            'error': f'Failed to generate insights: {str(e)}',
+            'success': False
+        }, status=500)
+
+    response = JsonResponse({
+        'summary': insights.get('summary', ''),
+        'descriptions': insights.get('descriptions', {}),
+        'success': True
+    })
+    if request.method == "GET":
+        # The same NEO always gets the same insights
+        patch_cache_control(response, public=True, max_age=NEO_DETAIL_MAX_AGE)
+    return response
+
 # Async endpoint for NEO summary
 @csrf_exempt
-def get_neo_summary(request):
+async def get_neo_summary(request):
     if request.method == "POST":
         neo = {
             'name': request.POST.get("name"),
@@ -226,7 +469,7 @@ def get_neo_summary(request):
         
         try:
             # Get AI summary for this NEO
-            summary_text = summarize_asteroid(neo)
+            summary_text = (await agenerate_neo_insights(neo)).get('summary', '')
             
             return JsonResponse({
                 'summary': summary_text,
@@ -242,7 +485,7 @@ def get_neo_summary(request):
 
 # Async endpoint for NEO fun descriptions
 @csrf_exempt 
-def get_neo_descriptions(request):
+async def get_neo_descriptions(request):
     if request.method == "POST":
         neo = {
             'name': request.POST.get("name"),
@@ -254,7 +497,7 @@ def get_neo_descriptions(request):
         
         try:
             # Get fun descriptions for this NEO
-            fun_descriptions = generate_fun_descriptions(neo)
+            fun_descriptions = (await agenerate_neo_insights(neo)).get('descriptions', {})
             
             return JsonResponse({
                 'descriptions': fun_descriptions,
@@ -270,7 +513,7 @@ def get_neo_descriptions(request):
 
 # an endpoint that take takes neo details and a question and returns a json response from gemini
 @csrf_exempt
-def chat_quackstronaut(request):
+async def chat_quackstronaut(request):
     if request.method == "POST":
         neo = {
             'name': request.POST.get("name"),
@@ -280,13 +523,13 @@ def chat_quackstronaut(request):
             'date': request.POST.get("date"),
         }
         question = request.POST.get("question")
-        user = request.session.get('user')
+        user = await request.session.aget('user')
         
         # Track chat question for achievements
         if user:
-            track_user_interaction(user['email'], 'chat_question', neo['name'])
+            await sync_to_async(track_user_interaction)(await aget_explorer_id(request), 'chat_question', neo['name'])
         
-        response = chat_with_quackstronaut(neo, question)
+        response = await achat_with_quackstronaut(neo, question)
         
         return JsonResponse({
             'response': response,
@@ -294,6 +537,40 @@ def chat_quackstronaut(request):
         })
     return JsonResponse({'success': False})
 
+# streams the quackstronaut answer as server-sent events while gemini generates it
+@csrf_exempt
+async def chat_quackstronaut_stream(request):
+    if request.method != "POST":
+        return JsonResponse({'success': False}, status=400)
+
+    neo = {
+        'name': request.POST.get("name"),
+        'diameter': request.POST.get("diameter"),
+        'speed': request.POST.get("speed"),
+        'miss_distance': request.POST.get("miss_distance"),
+        'date': request.POST.get("date"),
+    }
+    question = request.POST.get("question")
+    user = await request.session.aget('user')
+
+    # Track chat question for achievements
+    if user:
+        await sync_to_async(track_user_interaction)(await aget_explorer_id(request), 'chat_question', neo['name'])
+
+    async def events():
+        try:
+            async for text in astream_with_quackstronaut(neo, question):
+                yield f"data: {json.dumps({'delta': text})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            return
+        yield "event: done\ndata: {}\n\n"
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # keep proxies from holding the stream back
+    return response
+
 # saved the current neo as a favorite
 @csrf_exempt
 def save_favorite(request):
@@ -302,10 +579,11 @@ def save_favorite(request):
         user = request.session.get("user")
 
         if user and neo_name:
+            explorer_id = get_explorer_id(request)
             try:
                 # First, check if this favorite already exists
                 existing_favorite = FavoriteNEO.objects.filter(
-                    user_email=user["email"],
+                    explorer_id=explorer_id,
                     name=neo_name
                 ).first()
                 
@@ -315,19 +593,23 @@ def save_favorite(request):
                     existing_favorite.speed = request.POST.get("speed") 
                     existing_favorite.miss_distance = request.POST.get("miss_distance")
                     existing_favorite.date = request.POST.get("date")
+                    existing_favorite.neo_id = request.POST.get("neo_id") or existing_favorite.neo_id
                     existing_favorite.save()
+                    favorites_namespace(explorer_id).invalidate()
                 else:
                     # Create new favorite
                     FavoriteNEO.objects.create(
-                        user_email=user["email"],
+                        explorer_id=explorer_id,
+                        neo_id=request.POST.get("neo_id", ""),
                         name=neo_name,
                         diameter=request.POST.get("diameter"),
                         speed=request.POST.get("speed"),
                         miss_distance=request.POST.get("miss_distance"),
                         date=request.POST.get("date"),
                     )
+                    favorites_namespace(explorer_id).invalidate()
                     # Track favoriting for achievements (only for new favorites)
-                    track_user_interaction(user['email'], 'neo_favorited', neo_name)
+                    track_user_interaction(explorer_id, 'neo_favorited', neo_name)
                     
             except Exception as e:
                 # Handle any database errors gracefully
@@ -349,15 +631,18 @@ def unfavorite(request):
         user = request.session.get("user")
 
         if user and neo_name:
+            explorer_id = get_explorer_id(request)
             try:
                 # Find and delete the favorite
                 favorite = FavoriteNEO.objects.filter(
-                    user_email=user["email"],
+                    explorer_id=explorer_id,
                     name=neo_name
                 ).first()
                 
                 if favorite:
                     favorite.delete()
+                    favorites_namespace(explorer_id).invalidate()
+                    record_unfavorite(explorer_id)
             except Exception as e:
                 # Handle any database errors gracefully
                 print(f"Error removing favorite: {e}")
@@ -378,8 +663,9 @@ def profile(request):
         return redirect("/")
     
     # Get user stats and achievements
-    stats = get_user_stats(user['email'])
-    achievements = get_user_achievements(user['email'])
+    explorer_id = get_explorer_id(request)
+    stats = get_user_stats(explorer_id)
+    achievements = get_user_achievements(explorer_id)
     
     return render(request, 'sentinel/profile.html', {
         'user': user,
@@ -387,3 +673,17 @@ def profile(request):
         'achievements': achievements
     })
 
+
+
+# Counters of this worker process, for comparing model tiers and cache settings.
+# Signed in through /admin/ with a staff account.
+@staff_member_required
+def get_stats(request):
+    buffer = interaction_buffer.buffer
+    return JsonResponse({
+        'gemini': gemini.get_timings(),
+        'ai_cache': ai_cache.get_stats(),
+        'neows': neows.client.get_stats(),
+        'cache': {alias: caching.get_stats(alias) for alias in settings.CACHES},
+        'interaction_buffer': {'dropped': buffer.dropped} if buffer else None,
+    }, headers={'Cache-Control': 'no-store'})